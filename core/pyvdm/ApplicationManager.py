@@ -1,23 +1,31 @@
 #!/usr/bin/env python3
 import argparse
-import dbus
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
 from pathlib import Path
-import psutil
 import re
 import subprocess
-from termcolor import colored
+import tempfile
+import threading
 
-import pyvdm.core.PluginManager as P_MAN
-from pyvdm.core.PluginManager import MetaPlugin
+from pyvdm.core.codec import (GLOBAL_OFFLOAD, dump_legacy, dump_records, is_empty, load_records)
 from pyvdm.core.errcode import ApplicationCode as ERR
-from pyvdm.interface import CapabilityLibrary
-from pyvdm.core.utils import (POSIX, KeyringEnDec, ConfigFile, retry_with_timeout)
+from pyvdm.core.process import GLOBAL_PROCESSES
+from pyvdm.core.watcher import DirectoryWatcher
+from pyvdm.core.utils import (POSIX, STAT_EXCHANGE_BUFFER, KeyringEnDec, ConfigFile, json_load, lazy_import, retry_with_timeout)
+
+dbus = lazy_import('dbus')
+termcolor = lazy_import('termcolor')
+P_MAN = lazy_import('pyvdm.core.PluginManager')
+CapabilityLibrary = lazy_import('pyvdm.interface.CapabilityLibrary')
 
 PARENT_ROOT = Path('~/.vdm').expanduser()
+INDEX_FILENAME = 'applications.json'
 HINT_GENERATED = '(auto-generated)'
 CHECKED_SYMBOL = '✔'
+COMPATIBLE_PREFIX = 'org.VDMCompatible.'
+DBUS_FAN_OUT = 8 #the instances of one application called at once
 GLOBAL_KEYRING = KeyringEnDec()
 
 def _non_gui_filter(conf) -> bool:
@@ -36,60 +44,133 @@ def _compatibility_filter(conf):
         return None
     pass
 
+def _parse_desktop_entry(app_file) -> dict:
+    app_conf = ConfigFile(allow_no_value=True, default_section='Desktop Entry', strict=False)
+    app_conf.read( POSIX(app_file) )
+    if _non_gui_filter(app_conf):
+        return None #type: ignore
+    try:
+        return {
+            "name": app_conf['Desktop Entry']['Name'],
+            "exec": app_conf['Desktop Entry']['Exec'],
+            "icon": app_conf['Desktop Entry']['Icon'],
+            "path": POSIX(app_file),
+            "compatible": _compatibility_filter(app_conf)
+        }
+    except Exception as e:
+        return None #type: ignore
+
+class DesktopIndex:
+    """The parsed desktop entries on disk, keyed by the path and revalidated
+    by (mtime, size), so a warm scan only stats the files."""
+    def __init__(self, filename=''):
+        self.filename = filename
+        self.entries = dict() #path -> {'key':[mtime_ns, size], 'entry':dict or None}
+        self.dirty = False
+        if filename:
+            try:
+                self.entries = json_load( POSIX(filename) )
+            except:
+                pass
+        pass
+
+    def get(self, app_file) -> dict:
+        _path = POSIX(app_file)
+        try:
+            _st = os.stat(_path)
+        except OSError:
+            self.drop(_path)
+            return None #type: ignore
+        _key = [_st.st_mtime_ns, _st.st_size]
+        item = self.entries.get(_path)
+        if not item or item['key']!=_key:
+            item = { 'key':_key, 'entry':_parse_desktop_entry(_path) }
+            self.entries[_path] = item
+            self.dirty = True
+        return dict(item['entry']) if item['entry'] else None #type: ignore
+
+    def drop(self, app_file):
+        if self.entries.pop(POSIX(app_file), None):
+            self.dirty = True
+        pass
+
+    def prune(self, seen:set):
+        for _path in set(self.entries) - set(seen):
+            self.drop(_path)
+        pass
+
+    def save(self):
+        if not (self.filename and self.dirty):
+            return
+        try:
+            Path(self.filename).parent.mkdir(parents=True, exist_ok=True)
+            _fd, _temp = tempfile.mkstemp( dir=POSIX(Path(self.filename).parent) )
+            with os.fdopen(_fd, 'w') as fd:
+                json.dump(self.entries, fd)
+            os.replace( _temp, POSIX(self.filename) )
+            self.dirty = False
+        except OSError:
+            pass #kept in memory only
+        pass
+
+    pass
+
 class DefaultCompatibility:
-    def __init__(self, name, conf):
+    STAT_EXCHANGE = STAT_EXCHANGE_BUFFER #the stat stays in memory until the commit
+
+    def __init__(self, name, conf, compress=False):
         self.name = name
         self.conf = conf
         self.exec = conf['exec'].split()[0]
         self.name = Path(self.exec).name
+        self.compress = compress
+        self.spawned = set() #the resumed processes not attached to the domain cgroup
         self.xm = CapabilityLibrary.CapabilityHandleLocal('x11-manager')
         pass
 
     def onClose(self) -> int:
-        os.system(f'killall {self.name}')
+        ## only the processes in the domain, unlike `killall`
+        GLOBAL_PROCESSES.kill(self.name, spawned=self.spawned)
+        self.spawned = set()
         return 0
     
     def onSave(self, stat_file) -> int:
         record = list()
         ##
-        for proc in psutil.process_iter(['name', 'pid', 'cmdline']):
-            if proc.name()==self.name:
-                _windows = self.xm.get_windows_by_pid( proc.pid )
-                if len(_windows)==1: #only record one-to-one (pid,xid) mapping
-                    record.append({
-                        'cmdline': proc.cmdline(),
-                        'window': {
-                            'desktop': _windows[0]['desktop'],
-                            'states':  _windows[0]['states'],
-                            'xyhw':    _windows[0]['xyhw']
-                        }
-                    })
-                break
+        ## the shared snapshot of the phase, never a scan per application
+        for proc in GLOBAL_PROCESSES.by_name(self.name, self.spawned)[:1]:
+            _windows = self.xm.get_windows_by_pid( proc['pid'] )
+            if len(_windows)==1: #only record one-to-one (pid,xid) mapping
+                record.append({
+                    'cmdline': proc['cmdline'],
+                    'window': {
+                        'desktop': _windows[0]['desktop'],
+                        'states':  _windows[0]['states'],
+                        'xyhw':    _windows[0]['xyhw']
+                    }
+                })
             pass
         ##
-        with open(stat_file, 'w') as f:
-            # json.dump(record, f)
-            data = GLOBAL_KEYRING.encrypt(self.name, json.dumps(record))
-            f.write(data)
+        if self.compress:
+            dump_records(record, stat_file, GLOBAL_KEYRING.key(self.name), True, GLOBAL_OFFLOAD)
+        else:
+            dump_legacy(record, stat_file, GLOBAL_KEYRING.key(self.name), GLOBAL_OFFLOAD)
         return 0
 
     def onResume(self, stat_file, _new:bool) -> int:
         ## load stat file with failure check
-        with open(stat_file, 'r') as f:
-            _file = f.read().strip()
-        if len(_file)==0:
-            return 0
-        else:
-            try:
-                # json.dump(record, f)
-                data = GLOBAL_KEYRING.decrypt( self.name, f.read() )
-                record = json.loads(data)
-            except:
-                return -1
+        try:
+            record = list( load_records(stat_file, GLOBAL_KEYRING.key(self.name)) )
+        except:
+            return -1
         ## rearrange windows by pid
         for item in record:
             # proc = subprocess.Popen(item['cmdline'], start_new_session=True)
             proc = subprocess.Popen(self.exec, start_new_session=True)
+            if GLOBAL_PROCESSES.attachable():
+                GLOBAL_PROCESSES.tracker().attach(proc.pid) #tracked with the domain cgroup
+            else:
+                self.spawned.add(proc.pid)
             _lambda_fn = lambda: self.xm.get_windows_by_pid(proc.pid)
             _window = retry_with_timeout(_lambda_fn, default=[])[0]
             ##
@@ -110,6 +191,7 @@ class CompatibleInterface:
         ##
         _iface = dbus.Interface(self.node, 'org.freedesktop.DBus.Introspectable')
         self.available = ( '<node name="/">' in _iface.Introspect() )
+        self._pid = None
         pass
 
     @property
@@ -118,7 +200,10 @@ class CompatibleInterface:
     
     @property
     def pid(self) -> int:
-        return int( self.dbus_iface.GetConnectionUnixProcessID(self.dbus_name) )
+        ## fixed for the lifetime of the owner
+        if self._pid is None:
+            self._pid = int( self.dbus_iface.GetConnectionUnixProcessID(self.dbus_name) )
+        return self._pid
 
     def Save(self) -> str:
         return str( self.iface.Save() )
@@ -130,80 +215,192 @@ class CompatibleInterface:
         self.iface.Close()
     pass
 
+class InterfacePool:
+    """The `CompatibleInterface` of each compatible bus name, built once.
+
+    The proxies and the introspection results are cached per bus name, and
+    dropped when the name changes its owner. With the GLib main loop, the
+    names are followed by `NameOwnerChanged` and a read costs no round trip;
+    otherwise each read validates the cache with a single `ListNames`.
+    """
+    def __init__(self, prefix=COMPATIBLE_PREFIX):
+        self.prefix = prefix
+        self.lock = threading.RLock()
+        self.sess = None
+        self.loop = None
+        self.names = None #the bus names followed by the signal, None without the loop
+        self.cache = dict() #bus name -> CompatibleInterface, or None if not available
+        pass
+
+    def __connect(self):
+        if self.sess:
+            return
+        try:
+            from dbus.mainloop.glib import (DBusGMainLoop, threads_init)
+            from gi.repository import GLib # type: ignore
+            threads_init()
+            self.sess = dbus.SessionBus( private=True, mainloop=DBusGMainLoop() ) #never the shared one without the loop
+            self.sess.add_signal_receiver(self.__on_owner_changed, signal_name='NameOwnerChanged',
+                            dbus_interface='org.freedesktop.DBus', bus_name='org.freedesktop.DBus')
+            self.names = { str(x) for x in self.sess.list_names() if str(x).startswith(self.prefix) }
+            self.loop = GLib.MainLoop()
+            threading.Thread(target=self.loop.run, name='vdm-dbus', daemon=True).start()
+        except ImportError:
+            self.sess = dbus.SessionBus() #validate by `ListNames` on read
+        pass
+
+    def __on_owner_changed(self, name, old_owner, new_owner):
+        name = str(name)
+        if not name.startswith(self.prefix):
+            return
+        with self.lock:
+            self.cache.pop(name, None) #the proxy is bound to the old owner
+            if new_owner:
+                self.names.add(name)
+            else:
+                self.names.discard(name)
+        pass
+
+    def interfaces(self, keyword:str) -> list:
+        with self.lock:
+            self.__connect()
+            if self.names is not None:
+                _names = set(self.names)
+            else:
+                _names = { str(x) for x in self.sess.list_names() if str(x).startswith(self.prefix) }
+                for name in set(self.cache) - _names:
+                    self.cache.pop(name)
+            ##
+            result = list()
+            for name in sorted(_names):
+                if keyword not in name: continue
+                if name not in self.cache:
+                    try:
+                        _iface = CompatibleInterface(self.sess, name)
+                        self.cache[name] = _iface if _iface.available else None
+                    except dbus.exceptions.DBusException:
+                        continue #gone in between, retry on the next read
+                if self.cache[name]:
+                    result.append( self.cache[name] )
+            return result
+
+    def invalidate(self, name=None):
+        with self.lock:
+            if name is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(name, None)
+        pass
+
+    def close(self):
+        with self.lock:
+            if self.loop:
+                self.loop.quit()
+                self.sess.close()
+            self.loop, self.sess, self.names = None, None, None
+            self.cache.clear()
+        pass
+
+    pass
+
+GLOBAL_INTERFACES = InterfacePool()
+
 class ProbedCompatibility:
-    def __init__(self, name, conf, encrypted=False):
+    STAT_EXCHANGE = STAT_EXCHANGE_BUFFER #the stat stays in memory until the commit
+
+    def __init__(self, name, conf, encrypted=False, compress=False, fan_out=DBUS_FAN_OUT):
         self.name = name
         self.conf = conf
         self.exec = conf['exec'].split()[0]
         self.enc = encrypted
+        self.compress = compress
+        self.fan_out = fan_out
+        self.errors = dict() #bus name -> the failure of the last operation
         self.xm = CapabilityLibrary.CapabilityHandleLocal('x11-manager')
         pass
     
     @property
     def app_ifaces(self):
-        sess = dbus.SessionBus()
-        _names = filter(lambda x:f'org.VDMCompatible.{self.name}' in x, sess.list_names()) # type: ignore
-        app_ifaces = [ CompatibleInterface(sess, x) for x in _names ]
-        app_ifaces = [ x for x in app_ifaces if x.available ]
-        return app_ifaces
+        return GLOBAL_INTERFACES.interfaces(f'{COMPATIBLE_PREFIX}{self.name}')
+
+    def __dispatch(self, fn, tasks:list):
+        ## run `fn(app, *args)` for all the instances at once, the failed ones are reported and skipped
+        if not tasks:
+            return
+        with ThreadPoolExecutor(max(1, min(self.fan_out, len(tasks))), f'vdm-{self.name}') as executor:
+            _futures = [ executor.submit(fn, *x) for x in tasks ]
+            for x,_future in zip(tasks, _futures):
+                try:
+                    yield _future.result()
+                except Exception as e:
+                    self.errors[x[0].dbus_name] = str(e)
+                    print( f'Instance "{x[0].dbus_name}" of "{self.name}" failed: {e}' )
+        pass
+
+    def __window(self, app, wait=False) -> dict:
+        if not app.xid:
+            _lambda_fn = lambda: self.xm.get_windows_by_pid(app.pid)
+        else:
+            _lambda_fn = lambda: self.xm.get_windows_by_xid(app.xid)
+        return retry_with_timeout(_lambda_fn, default=[])[0] if wait else _lambda_fn()[0]
+
+    def __place(self, app, sp, wait=False):
+        _window = self.__window(app, wait)
+        self.xm.set_window_by_xid(_window['xid'], sp['desktop'], sp['states'], sp['xyhw'])
+        pass
+
+    def __record(self, app) -> dict:
+        stat = app.Save()
+        _window = self.__window(app)
+        return {
+            'stat': stat,
+            'window': {
+                'desktop': _window['desktop'],
+                'states':  _window['states'],
+                'xyhw':    _window['xyhw']
+            }
+        }
+
+    def __restore(self, app, stat, sp, new:bool):
+        app.Resume(stat, new)
+        app.Save() #for possible xid update
+        self.__place(app, sp, wait=True)
+        pass
+
+    def records(self):
+        self.errors = dict()
+        yield from self.__dispatch(self.__record, [ (x,) for x in self.app_ifaces ])
+        pass
 
     def onSave(self, stat_file) -> int:
-        record = list()
-        for app in self.app_ifaces:
-            stat = app.Save()
-            ##
-            if not app.xid:
-                _window = self.xm.get_windows_by_pid(app.pid)[0]
-            else:
-                _window = self.xm.get_windows_by_xid(app.xid)[0]
-            ##
-            record.append({
-                'stat': stat,
-                'window': {
-                    'desktop': _window['desktop'],
-                    'states':  _window['states'],
-                    'xyhw':    _window['xyhw']
-                }
-            })
-        ##
-        with open(stat_file, 'w') as f:
-            if self.enc:
-                data = GLOBAL_KEYRING.encrypt(self.name, json.dumps(record))
-                f.write(data)
-            else:
-                json.dump(record, f)
+        ## all the instances are saved at once, and encoded in order
+        _key = GLOBAL_KEYRING.key(self.name) if self.enc else None
+        if self.compress:
+            dump_records(self.records(), stat_file, _key, True, GLOBAL_OFFLOAD)
+        else:
+            dump_legacy(self.records(), stat_file, _key, GLOBAL_OFFLOAD)
         return 0
     
     def onResume(self, stat_file, new:bool) -> int:
         ## load stat file with failure check
-        with open(stat_file, 'r') as f:
-            _content = f.read().strip()
-        if len(_content)==0:
+        if is_empty(stat_file):
             return 0
-        else:
-            try:
-                if self.enc:
-                    data = GLOBAL_KEYRING.decrypt( self.name, _content )
-                    record = json.loads(data)
-                else:
-                    record = json.loads(_content)
-            except:
-                return -1
+        try:
+            _key = GLOBAL_KEYRING.key(self.name) if self.enc else None
+            new_stats = { x['stat']:x['window'] for x in load_records(stat_file, _key) }
+        except:
+            return -1
+        self.errors = dict()
         
-        old_stats = { x.Save():x for x in self.app_ifaces }
-        new_stats = { x['stat']:x['window'] for x in record }
+        old_stats = dict( self.__dispatch(lambda app: (app.Save(), app), [ (x,) for x in self.app_ifaces ]) )
         ## keep no-change-needed windows
-        _remaining = dict()
+        _kept, _remaining = list(), dict()
         for stat,sp in new_stats.items():
             if stat in old_stats:
-                app = old_stats.pop(stat)
-                if not app.xid:
-                    _window = self.xm.get_windows_by_pid(app.pid)[0]
-                else:
-                    _window = self.xm.get_windows_by_xid(app.xid)[0]
-                self.xm.set_window_by_xid(_window['xid'], sp['desktop'], sp['states'], sp['xyhw'])
+                _kept.append( (old_stats.pop(stat), sp) )
             else:
                 _remaining.update({ stat : sp })
+        list( self.__dispatch(self.__place, _kept) )
         ## manipulate with the remaining
         if _remaining:
             ## create new windows
@@ -211,25 +408,16 @@ class ProbedCompatibility:
                 subprocess.Popen(self.exec, start_new_session=True)
             retry_with_timeout( lambda: len(self.app_ifaces)==len(_remaining), 3 )
             ## resume stats and window positions
-            for (stat,sp), app in zip(_remaining.items(), self.app_ifaces): # type: ignore
-                app.Resume(stat, new)
-            for (stat,sp), app in zip(_remaining.items(), self.app_ifaces): # type: ignore
-                app.Save() #for possible xid update
-                if not app.xid:
-                    _lambda_fn = lambda: self.xm.get_windows_by_pid(app.pid)
-                else:
-                    _lambda_fn = lambda: self.xm.get_windows_by_xid(app.xid)
-                _window = retry_with_timeout(_lambda_fn, default=[])[0]
-                self.xm.set_window_by_xid(_window['xid'], sp['desktop'], sp['states'], sp['xyhw'])
+            _tasks = [ (app, stat, sp, new) for (stat,sp), app in zip(_remaining.items(), self.app_ifaces) ]
+            list( self.__dispatch(self.__restore, _tasks) )
         else:
             ## close the no-needed old windows
-            for app in old_stats.values():
-                app.Close()
+            list( self.__dispatch(lambda app: app.Close(), [ (x,) for x in old_stats.values() ]) )
         return 0
 
     def onClose(self) -> int:
-        for app in self.app_ifaces:
-            app.Close()
+        self.errors = dict()
+        list( self.__dispatch(lambda app: app.Close(), [ (x,) for x in self.app_ifaces ]) )
         return 0
 
     pass
@@ -261,44 +449,38 @@ class ApplicationManager:
         return dict()
 
     @staticmethod
-    def list_all_applications() -> dict:
-        applications = dict()
-        ##
+    def application_directories() -> list:
         try:
             data_dirs = os.environ['XDG_DATA_DIRS'].split(':')[::-1] #reverse for priority
         except:
-            data_dirs = ['/usr/local/share', '/usr/share', '~/.local/share']
+            data_dirs = ['/usr/local/share', '/usr/share']
+        ## the user entries always take the highest priority
+        data_dirs.append( os.environ.get('XDG_DATA_HOME') or '~/.local/share' )
+        _dirs = [ Path(x).expanduser() / 'applications' for x in data_dirs ]
+        return [ x for i,x in enumerate(_dirs) if x not in _dirs[i+1:] ]
+
+    @staticmethod
+    def list_all_applications(index=None) -> dict:
+        applications = dict()
+        index = index if index else DesktopIndex()
         ##
-        for xdg_path in data_dirs:
-            app_dir = Path(xdg_path).expanduser() / 'applications'
+        _seen = set()
+        for app_dir in ApplicationManager.application_directories():
             if app_dir.exists():
                 for app_file in app_dir.glob('*.desktop'):
-                    app_conf = ConfigFile(allow_no_value=True, default_section='Desktop Entry', strict=False)
-                    app_conf.read( app_file.as_posix() )
-                    if not _non_gui_filter(app_conf):
-                        try:
-                            applications[ app_file.stem ] = {
-                                "name": app_conf['Desktop Entry']['Name'],
-                                "exec": app_conf['Desktop Entry']['Exec'],
-                                "icon": app_conf['Desktop Entry']['Icon'],
-                                "path": app_file.as_posix(),
-                                "compatible": _compatibility_filter(app_conf) 
-                            }
-                        except Exception as e:
-                            pass
+                    _seen.add( POSIX(app_file) )
+                    _app = index.get(app_file)
+                    if _app:
+                        applications[ app_file.stem ] = _app
                     pass
             pass
+        index.prune(_seen)
+        index.save()
         return applications
 
     @staticmethod
     def restore_desktop_files():
-        try:
-            data_dirs = os.environ['XDG_DATA_DIRS'].split(':')[::-1] #reverse for priority
-        except:
-            data_dirs = ['/usr/local/share', '/usr/share', '~/.local/share']
-        ##
-        for xdg_path in data_dirs:
-            app_dir = Path(xdg_path).expanduser() / 'applications'
+        for app_dir in ApplicationManager.application_directories():
             if app_dir.exists():
                 for app_file in app_dir.glob('*.desktop'):
                     app_conf = ConfigFile(allow_no_value=True, default_section='Desktop Entry', strict=False)
@@ -310,7 +492,7 @@ class ApplicationManager:
                             app_conf['Desktop Entry']['Exec'] = orig_cmdline
                             with open(app_file.as_posix(), 'w') as f:
                                 app_conf.write(f)
-                            _colored_cmdline = colored(orig_cmdline, 'green')
+                            _colored_cmdline = termcolor.colored(orig_cmdline, 'green')
                             print( f'"{app_file}" restored to:\t"{_colored_cmdline}".' )
                     except:
                         pass
@@ -329,6 +511,10 @@ class ApplicationManager:
             self.pm = pm
         ##
         self.applications = dict()
+        self.index = DesktopIndex( POSIX(self.root / INDEX_FILENAME) )
+        self.lock = threading.RLock()
+        self.watcher = None
+        self.subscribers = list()
         pass
 
     @staticmethod
@@ -340,7 +526,7 @@ class ApplicationManager:
                 return plugin_name
         return ''
 
-    def instantiate_plugin(self, app_name) -> MetaPlugin:
+    def instantiate_plugin(self, app_name, compress=False) -> 'P_MAN.MetaPlugin':
         if not self.applications: self.refresh()
         app = self.applications[app_name]
         compatibility = app['compatible']
@@ -348,9 +534,9 @@ class ApplicationManager:
         if not compatibility:
             return None # type: ignore
         elif compatibility==CHECKED_SYMBOL:
-            return MetaPlugin( app_name, ProbedCompatibility(app_name, app) )
+            return P_MAN.MetaPlugin( app_name, ProbedCompatibility(app_name, app, compress=compress) )
         elif compatibility==HINT_GENERATED:
-            return MetaPlugin( app_name, DefaultCompatibility(app_name, app) )
+            return P_MAN.MetaPlugin( app_name, DefaultCompatibility(app_name, app, compress=compress) )
         else:
             return self.pm.getInstalledPlugin(compatibility)
         pass
@@ -372,30 +558,99 @@ class ApplicationManager:
             os.chmod(alt_app_file.as_posix(), 0o755)
         pass
 
-    def refresh(self):
-        _apps = self.list_all_applications()
-        _plugins,_ = self.pm.getPluginsWithTarget()
-        ##
-        for app_name,app in _apps.items():
-            if app_name not in self.applications:
-                if app['compatible']!=CHECKED_SYMBOL:
-                    plugin_name = self.__plugin_supported(_plugins, app_name)
-                    if plugin_name:
-                        app['compatible'] = plugin_name
-                    else:
-                        app['compatible'] = HINT_GENERATED
-                ##
-                self.applications[app_name] = app
-            ##
-            if app['compatible']!=HINT_GENERATED:
-                self.__update_desktop_file(app)
+    def __resolve(self, plugins:dict, app_name, app):
+        if app['compatible']!=CHECKED_SYMBOL:
+            plugin_name = self.__plugin_supported(plugins, app_name)
+            if plugin_name:
+                app['compatible'] = plugin_name
+            else:
+                app['compatible'] = HINT_GENERATED
         ##
-        _applications = self.applications
-        _applications = dict(sorted( _applications.items(), key=lambda x:x[1]['name'] ))
+        if app['compatible']!=HINT_GENERATED:
+            self.__update_desktop_file(app)
+        return app
+
+    def __sort(self, applications:dict):
+        ## the readers never see a partial registry, only the swapped one
+        _applications = dict(sorted( applications.items(), key=lambda x:x[1]['name'] ))
         _applications = dict(sorted( _applications.items(), key=lambda x:x[1]['compatible'], reverse=True ))
         self.applications = _applications
         return _applications
 
+    def refresh(self):
+        with self.lock:
+            _apps = self.list_all_applications(self.index)
+            _plugins,_ = self.pm.getPluginsWithTarget()
+            ##
+            _applications = dict(self.applications)
+            for app_name,app in _apps.items():
+                if app_name not in _applications:
+                    _applications[app_name] = self.__resolve(_plugins, app_name, app)
+                elif app['compatible']!=HINT_GENERATED:
+                    self.__update_desktop_file(app)
+            return self.__sort(_applications)
+
+    #---------- live application registry ----------#
+    def subscribe(self, callback):
+        ## callback(event, app_name, app), event in ['added', 'changed', 'removed']
+        self.subscribers.append(callback)
+        pass
+
+    def __emit(self, event, app_name, app):
+        for callback in list(self.subscribers):
+            try:
+                callback(event, app_name, app)
+            except Exception as e:
+                print(f'Application subscriber failed: {e}')
+        pass
+
+    def update(self, paths=None) -> list:
+        """Apply the changed desktop files, or rescan all with `None`."""
+        with self.lock:
+            _app_dirs = self.application_directories()[::-1] #the highest priority first
+            if paths is None:
+                _names = set(self.applications) | set( self.list_all_applications(self.index) )
+            else:
+                _names = { Path(x).stem for x in paths if Path(x).suffix=='.desktop' }
+            _plugins = None
+            _applications = dict(self.applications)
+            events = list()
+            for app_name in _names:
+                ## the entry of the highest priority still existing
+                _app = next( filter(None, (self.index.get(x/f'{app_name}.desktop') for x in _app_dirs)), None )
+                _old = _applications.get(app_name)
+                if not _app:
+                    if _old:
+                        _applications.pop(app_name)
+                        events.append( ('removed', app_name, _old) )
+                    continue
+                if _old and all( _old[k]==_app[k] for k in ['path', 'name', 'exec', 'icon'] ):
+                    continue
+                if _plugins is None:
+                    _plugins,_ = self.pm.getPluginsWithTarget()
+                _applications[app_name] = self.__resolve(_plugins, app_name, _app)
+                events.append( ('changed' if _old else 'added', app_name, _app) )
+            self.index.save()
+            if events:
+                self.__sort(_applications)
+        for event in events:
+            self.__emit(*event)
+        return events
+
+    def watch(self, polling=False):
+        if self.watcher:
+            return self.watcher
+        if not self.applications: self.refresh()
+        self.watcher = DirectoryWatcher(self.application_directories(), self.update,
+                            pattern='*.desktop', polling=polling).start()
+        return self.watcher
+
+    def unwatch(self):
+        if self.watcher:
+            self.watcher.stop()
+        self.watcher = None
+        pass
+
     def show_compatibility(self):
         if not self.applications: self.refresh()
         ret = { k:v['compatible'] for k,v in self.applications.items() }
@@ -3,22 +3,23 @@ import argparse
 import json
 import os
 from pathlib import Path
-import psutil
-import requests
 import shutil
 import subprocess as sp
 import tempfile
 from urllib.parse import urlparse
 
-from pyvdm.daemon.vdm_capability_daemon import CapabilityDaemon
-from pyvdm.core.utils import (POSIX, )
+from pyvdm.core.utils import (POSIX, lazy_import)
 from pyvdm.core.errcode import CapabilityCode as ERR
 
+psutil = lazy_import('psutil')
+requests = lazy_import('requests')
+VCD = lazy_import('pyvdm.daemon.vdm_capability_daemon')
+
 PARENT_ROOT = Path('~/.vdm').expanduser()
 CAPABILITY_DIRECTORY = PARENT_ROOT / 'capability'
 
 def _start_daemon(root):
-    CapabilityDaemon( root ).start_daemon()
+    VCD.CapabilityDaemon( root ).start_daemon()
 
 class CapabilityManager:
     def __init__(self, root=''):
@@ -76,7 +77,7 @@ class CapabilityManager:
             return ERR.VCD_INTERNAL_ERROR
 
     def enable(self, name:str) -> ERR:
-        vcd = CapabilityDaemon( root=self.root.as_posix() )
+        vcd = VCD.CapabilityDaemon( root=self.root.as_posix() )
         ret = vcd.enable(name)
         if ret:
             print(ret)
@@ -85,7 +86,7 @@ class CapabilityManager:
             return ERR.ALL_CLEAN
 
     def disable(self, name:str) -> ERR:
-        vcd = CapabilityDaemon( root=self.root.as_posix() )
+        vcd = VCD.CapabilityDaemon( root=self.root.as_posix() )
         ret = vcd.disable(name)
         if ret:
             print(ret)
@@ -94,7 +95,7 @@ class CapabilityManager:
             return ERR.ALL_CLEAN
 
     def status(self, name=''): #-> str or dict
-        vcd = CapabilityDaemon( root=self.root.as_posix() )
+        vcd = VCD.CapabilityDaemon( root=self.root.as_posix() )
         if not name:
             ret = dict()
             for name,_,content in os.walk(CAPABILITY_DIRECTORY):
@@ -2,22 +2,32 @@
 import argparse
 import os
 from pathlib import Path
-import psutil
 import re
 import shutil
 import tempfile
+import threading
 import time
 
-import pyvdm.core.ApplicationManager as A_MAN
-from pyvdm.core.ApplicationManager import HINT_GENERATED
-
-from pyvdm.core.utils import (POSIX, SHELL_POPEN, STAT_POSTFIX, StatFile, Tui, json_load, json_dump)
+from pyvdm.core.utils import (POSIX, SHELL_POPEN, STAT_POSTFIX, StatFile, Tui, json_load, json_dump, lazy_import)
 from pyvdm.core.errcode import DomainCode as ERR
+from pyvdm.core.generation import (GenerationStore, ObjectStore, OBJECT_DIRECTORY)
+from pyvdm.core.process import DomainTracker
+
+psutil = lazy_import('psutil')
+A_MAN = lazy_import('pyvdm.core.ApplicationManager')
 
 PARENT_ROOT = Path('~/.vdm').expanduser()
 DOMAIN_DIRECTORY = PARENT_ROOT / 'domains'
 CONFIG_FILENAME = 'config.json'
 OVERLAY_DIRECTORY = '.overlay'
+HISTORY_FILENAME = 'history.json'
+HISTORY_MAX_SIZE = 100
+PREWARM_BUDGET = {
+    'ttl': 300,             #the standby expires after (in seconds)
+    'max_rss': 64,          #maximum memory of the standby namespace (in MB)
+    'min_available': 512,   #minimum available system memory to keep it (in MB)
+    'interval': 5,          #the interval to enforce the budget on the standby (in seconds)
+}
 
 DOMAIN_NAME_BLACKLIST = [CONFIG_FILENAME, STAT_POSTFIX, OVERLAY_DIRECTORY]
 
@@ -48,6 +58,14 @@ class DomainManager():
         self.root.mkdir(exist_ok=True, parents=True)
         self.stat = StatFile( POSIX(self.root.parent) )
         self.stat.touch()
+        self.stat_lock = threading.RLock() #the record may be replaced while the old domain finalizes
+        self.objects = ObjectStore(self.root.parent / OBJECT_DIRECTORY)
+        ##
+        self.standby = None
+        self.standby_lock = threading.RLock()
+        self.standby_watcher = None
+        self.prewarm_budget = dict(PREWARM_BUDGET)
+        self.use_cgroup = True #track the domain processes by cgroup if delegated
         pass
 
     @property
@@ -63,7 +81,7 @@ class DomainManager():
             _,_plugins = self.am.pm.getPluginsWithTarget()
             plugins = { name:plugin['version'] for name,plugin in _plugins.items() }
             _applications = self.am.refresh()
-            applications = [k for k,v in _applications.items() if v['compatible']!=HINT_GENERATED]
+            applications = [k for k,v in _applications.items() if v['compatible']!=A_MAN.HINT_GENERATED]
         else:
             plugins = dict()
             applications = list()
@@ -161,11 +179,12 @@ class DomainManager():
                 shutil.move(tmp_lowerdir, parent_overlay)
         pass
 
-    def initialize_domain(self, name:str) -> ERR:
-        stat = self.stat.getStat()
-        ## check if domain already open
-        if stat['name'] and psutil.pid_exists( int(stat['pid']) ):
-            return ERR.DOMAIN_IS_OPEN
+    def is_independent(self, name:str, other:str) -> bool:
+        ## the overlays are independent if no temporary directories are shared
+        _stems = lambda x: { Path(*Path(x).parts[:i+1]).stem for i in range(len(Path(x).parts)) }
+        return not ( _stems(name) & _stems(other) )
+
+    def prepare_domain(self, name:str) -> tuple:
         ## setup lowerdir, upperdir, workdir
         (lowerdir, upperdir, workdir) = self.__init_overlay(name)
         (process, stderr) = _run_process(
@@ -178,24 +197,197 @@ class DomainManager():
         )
         ## check if process failed
         if stderr:
-            return ERR.DOMAIN_START_FAILED
+            self.__fini_overlay(name)
+            return (ERR.DOMAIN_START_FAILED, None)
         ## wait for the child process to start
         while not psutil.Process(process.pid).children():
             time.sleep(0.001)
         ppid = process.pid
         pid  = psutil.Process(ppid).children()[0].pid
-        ##
-        self.stat.putStat(name, ppid=ppid, pid=pid)
+        ## the children forked later are in the cgroup as well
+        cgroup = DomainTracker.create_cgroup(name, [ppid, pid]) if self.use_cgroup else ''
+        return (ERR.ALL_CLEAN, {'name':name, 'ppid':ppid, 'pid':pid, 'cgroup':cgroup})
+
+    def commit_domain(self, prepared:dict, history=True):
+        with self.stat_lock:
+            self.stat.putStat(prepared['name'], ppid=prepared['ppid'], pid=prepared['pid'], cgroup=prepared.get('cgroup',''))
+        if history:
+            self.record_history(prepared['name'])
+        pass
+
+    def __clear_record(self, stat:dict):
+        ## never clear the record of another domain committed meanwhile
+        with self.stat_lock:
+            _stat = self.stat.getStat()
+            if _stat['name']==stat['name'] and str(_stat.get('pid'))==str(stat['pid']):
+                self.stat.putStat('')
+        pass
+
+    def discard_domain(self, prepared:dict):
+        if not prepared:
+            return
+        os.system(f'kill -9 {prepared["ppid"]}')
+        DomainTracker(prepared['pid'], prepared.get('cgroup','')).destroy()
+        self.__clear_record(prepared)
+        self.__fini_overlay( prepared['name'] )
+        pass
+
+    def tracker(self, prepared:dict=None) -> DomainTracker:
+        ## the processes of the prepared, or the open domain
+        stat = prepared if prepared else self.stat.getStat()
+        if not stat.get('name') or not stat.get('pid'):
+            return None # type: ignore
+        return DomainTracker(stat['pid'], stat.get('cgroup',''))
+
+    #---------- transactional stat commit ----------#
+    def stat_store(self, name) -> GenerationStore:
+        return GenerationStore(self.root / name, self.objects)
+
+    def stat_directory(self, name:str) -> Path:
+        store = self.stat_store(name)
+        if not store.current():
+            store.commit({}) #migrate the flat stat files
+        store.recover()
+        return store.directory
+
+    def commit_stats(self, name:str, staged:dict):
+        ## all the outputs of one save land in one generation
+        if not staged:
+            return None
+        return self.stat_store(name).commit(staged)
+
+    def rollback_domain(self, name:str) -> ERR:
+        if not (self.root / name).exists():
+            return ERR.DOMAIN_NOT_EXIST
+        if self.open_domain_name==name:
+            return ERR.DOMAIN_IS_OPEN
+        if not self.stat_store(name).rollback():
+            return ERR.DOMAIN_ROLLBACK_FAILED
         return ERR.ALL_CLEAN
 
-    def finalize_domain(self):
+    #---------- speculative pre-warming -----------#
+    def load_history(self) -> list:
+        try:
+            return json_load( POSIX(self.root.parent / HISTORY_FILENAME) )
+        except:
+            return list()
+
+    def record_history(self, name:str):
+        history = self.load_history()
+        history.append({ 'name':name, 'time':int(time.time()) })
+        json_dump( POSIX(self.root.parent / HISTORY_FILENAME), history[-HISTORY_MAX_SIZE:] )
+        pass
+
+    def predict_next(self, current:str='', mode='frequency') -> str:
+        history = [ x['name'] for x in self.load_history() if x['name']!=current ]
+        history = [ x for x in history if (self.root / x / CONFIG_FILENAME).exists() ]
+        if not history:
+            return ''
+        if mode=='recency':
+            return history[-1]
+        ## frequency with recency decay
+        scores = dict()
+        for age,name in enumerate( reversed(history) ):
+            scores[name] = scores.get(name, 0) + 0.9**age
+        return max(scores, key=lambda x:scores[x])
+
+    def check_standby(self) -> bool:
+        if not self.standby:
+            return False
+        prepared, _time = self.standby['prepared'], self.standby['time']
+        try:
+            _procs = [ psutil.Process(prepared['ppid']) ]
+            _procs += _procs[0].children(recursive=True)
+            _rss = sum( x.memory_info().rss for x in _procs ) / 1024**2
+            _available = psutil.virtual_memory().available / 1024**2
+            _valid = ( time.time()-_time < self.prewarm_budget['ttl'] ) and \
+                     ( _rss < self.prewarm_budget['max_rss'] ) and \
+                     ( _available > self.prewarm_budget['min_available'] )
+        except psutil.Error:
+            _valid = False
+        ##
+        if not _valid:
+            self.discard_standby()
+        return _valid
+
+    def discard_standby(self):
+        with self.standby_lock:
+            standby, self.standby = self.standby, None
+        if standby:
+            self.discard_domain( standby['prepared'] )
+        pass
+
+    def prewarm_domain(self, name:str) -> ERR:
+        with self.standby_lock:
+            return self.__prewarm_domain(name)
+
+    def __prewarm_domain(self, name:str) -> ERR:
+        ## keep the standby if the guess holds
+        if self.standby and self.standby['prepared']['name']==name and self.check_standby():
+            return ERR.ALL_CLEAN
+        self.discard_standby()
+        ## never prepare the open domain, or the one sharing the overlay with it
+        _open_name = self.open_domain_name
+        if not (self.root / name / CONFIG_FILENAME).exists():
+            return ERR.DOMAIN_NOT_EXIST
+        if _open_name and not self.is_independent(_open_name, name):
+            return ERR.DOMAIN_IS_OPEN
+        if psutil.virtual_memory().available/1024**2 < self.prewarm_budget['min_available']:
+            return ERR.DOMAIN_START_FAILED
+        ##
+        (ret, prepared) = self.prepare_domain(name)
+        if ret is ERR.ALL_CLEAN:
+            self.standby = { 'prepared':prepared, 'time':time.time() }
+            self.__watch_standby()
+        return ret
+
+    def __watch_standby(self):
+        ## enforce the budget while the standby is resident, not only on the next use
+        if self.standby_watcher and self.standby_watcher.is_alive():
+            return
+        def _watch():
+            while True:
+                time.sleep( self.prewarm_budget['interval'] )
+                with self.standby_lock:
+                    if not self.check_standby(): #discarded if over the budget
+                        self.standby_watcher = None #a later standby starts its own
+                        break
+            pass
+        self.standby_watcher = threading.Thread(target=_watch, name='vdm-standby', daemon=True)
+        self.standby_watcher.start()
+        pass
+
+    def acquire_domain(self, name:str) -> tuple:
+        ## adopt the standby namespace if the guess is right
+        with self.standby_lock:
+            if self.standby and self.standby['prepared']['name']==name and self.check_standby():
+                prepared, self.standby = self.standby['prepared'], None
+                return (ERR.ALL_CLEAN, prepared)
+            self.discard_standby()
+        return self.prepare_domain(name)
+
+    def initialize_domain(self, name:str) -> ERR:
         stat = self.stat.getStat()
+        ## check if domain already open
+        if stat['name'] and psutil.pid_exists( int(stat['pid']) ):
+            return ERR.DOMAIN_IS_OPEN
+        ##
+        (ret, prepared) = self.acquire_domain(name)
+        if ret is not ERR.ALL_CLEAN:
+            return ret
+        self.commit_domain(prepared)
+        return ERR.ALL_CLEAN
+
+    def finalize_domain(self, stat:dict=None):
+        ## the open domain, or the given record of it
+        stat = stat if stat else self.stat.getStat()
         if not stat['name']:
             return
         ## kill the daemon process
         ppid = stat['ppid']
         os.system(f'kill -9 {ppid}')
-        self.stat.putStat('')
+        DomainTracker(stat['pid'], stat.get('cgroup','')).destroy()
+        self.__clear_record(stat)
         ## move back lowerdir and upperdir
         self.__fini_overlay( stat['name'] )
         pass
@@ -258,8 +450,9 @@ class DomainManager():
         if ret!=ERR.ALL_CLEAN:
             return ret
         ## update enabled plugins folder (and touch the stat file)
+        _stat_root = self.stat_directory(name)
         for _name in config['plugins'].keys():
-            StatFile(self.root / name, _name).touch()
+            StatFile(_stat_root, _name).touch()
         print('Domain \"%s\" updated.'%name)
         return ERR.ALL_CLEAN
 
@@ -291,9 +484,9 @@ class DomainManager():
         _conf['created_time'] = int(time.time())
         _conf['last_update_time'] = int(time.time())
         json_dump( child_path/CONFIG_FILENAME, _conf )
-        ## fork the parent domain: stat files
-        for stat_file in parent_path.glob(f'.*{STAT_POSTFIX}'):
-            shutil.copyfile( stat_file, child_path/stat_file.name )
+        ## fork the parent domain: stat files, by reference
+        self.stat_directory(parent_name)
+        self.stat_store(child_name).fork( self.stat_store(parent_name) )
         ## if parent domain is open, switch to child domain
         stat = self.stat.getStat()
         if stat['name']==parent_name:
@@ -306,7 +499,7 @@ class DomainManager():
                     f'mount -t overlay overlay -o lowerdir={lowerdir},upperdir={upperdir},workdir={workdir} $HOME\n',
                 ]
             )
-            self.stat.putStat(POSIX(child_name), ppid=ppid, pid=pid)
+            self.stat.putStat(POSIX(child_name), ppid=ppid, pid=pid, cgroup=stat.get('cgroup',''))
         ## fork the parent domain: overlay folder
         if copy:
             child_overlay   = child_path / OVERLAY_DIRECTORY
@@ -331,8 +524,11 @@ class DomainManager():
         if len(child_domains)>0 and not allow_recursive:
             return ERR.DOMAIN_NESTED_DOMAIN
         ## TODO: merge overlay before delete
+        _digests = [ x for item in domain_folder.glob(f'**/{CONFIG_FILENAME}')
+                        for x in self.stat_store(item.parent.relative_to(self.root)).digests() ]
         ## delete the content recursively
         shutil.rmtree(domain_folder, ignore_errors=True)
+        self.objects.release(_digests)
         return ERR.ALL_CLEAN
 
     def list_child_domain(self, name:str='') -> list:
@@ -361,6 +557,8 @@ def execute(dm, command, args, verbose=False):
         return dm.fork_domain(args.name, args.copy)
     elif command=='rm' or command=='remove':
         return dm.delete_domain(args.name)
+    elif command=='rollback':
+        return dm.rollback_domain(args.name)
     elif command=='ls' or command=='list':
         ret = dm.list_domain(args.names)
         print(ret)
@@ -399,6 +597,11 @@ def init_subparsers(subparsers):
     p_remove.add_argument('name', metavar='domain_name',
         help='the domain name.')
     #
+    p_rollback = subparsers.add_parser('rollback',
+        help='roll back the domain to the previously saved stat files.')
+    p_rollback.add_argument('name', metavar='domain_name',
+        help='the domain name.')
+    #
     p_list = subparsers.add_parser('list',
         help='list all available domains.')
     p_list.add_argument('names', metavar='domain_names', nargs='*',
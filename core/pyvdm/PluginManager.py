@@ -3,22 +3,23 @@ import argparse
 import ctypes
 from distutils.version import LooseVersion
 from functools import wraps
-from importlib import import_module
+from importlib.util import (spec_from_file_location, module_from_spec)
 import inspect
-import multiprocessing as mp
 import os
 from pathlib import Path
 import re
-import requests
 import shutil
 import sys
 import tempfile
 from urllib.parse import urlparse
 
 from pyvdm.interface import SRC_API
-from pyvdm.core.utils import (POSIX, WorkSpace, json_load)
+from pyvdm.core.utils import (POSIX, WorkSpace, json_load, lazy_import)
 from pyvdm.core.errcode import PluginCode as ERR
-from pyvdm.core.CapabilityManager import CapabilityManager
+from pyvdm.core.worker import (ISOLATION_THREAD, ISOLATION_PROCESS, IsolatedPlugin, PluginWorker)
+
+requests = lazy_import('requests')
+C_MAN = lazy_import('pyvdm.core.CapabilityManager')
 
 PLUGIN_BUILD_LEVEL = 'release'
 CONFIG_FILENAME    = 'package.json'
@@ -26,13 +27,28 @@ PARENT_ROOT = Path('~/.vdm').expanduser()
 PLUGIN_DIRECTORY= PARENT_ROOT / 'plugins'
 CAPABILITY_DIRECTORY = PARENT_ROOT / 'capability'
 REQUIRED_FIELDS = ['name', 'version', 'author', 'main', 'license']
-OPTIONAL_FIELDS = ['target', 'description', 'keywords', 'capability', 'scripts']
+OPTIONAL_FIELDS = ['target', 'description', 'keywords', 'capability', 'scripts',
+                   'after', 'before', 'priority', 'deadline', 'isolation']
 OPTIONAL_SCRIPTS= ['test', 'pre-install', 'post-install', 'pre-uninstall', 'post-uninstall']
 
+def has_change_hint(obj) -> bool:
+    ## only an explicit `onChanged`, never the default of `SRC_API`
+    if isinstance(obj, IsolatedPlugin):
+        return obj.hinted
+    if isinstance(obj, ctypes.CDLL):
+        return hasattr(obj, 'onChanged')
+    return getattr(type(obj), 'onChanged', SRC_API.onChanged) is not SRC_API.onChanged
+
 class MetaPlugin(SRC_API):
-    def __init__(self, name:str, obj):
+    def __init__(self, name:str, obj, config=None):
         self.name = name
         self.obj = obj
+        self.config = config if config else dict()
+
+    @property
+    def STAT_EXCHANGE(self) -> str:
+        _exchange = getattr(self.obj, 'STAT_EXCHANGE', SRC_API.STAT_EXCHANGE)
+        return _exchange if isinstance(_exchange, str) else SRC_API.STAT_EXCHANGE
 
     def onStart(self):
         if hasattr(self.obj, 'onStart'):
@@ -58,11 +74,21 @@ class MetaPlugin(SRC_API):
         if hasattr(self.obj, 'onClose'):
             return self.obj.onClose()
         return 0
+
+    def onChanged(self):
+        if hasattr(self.obj, 'onChanged'):
+            return self.obj.onChanged()
+        return 1
+
+    @property
+    def hinted(self) -> bool:
+        _obj = self.obj.obj if type(self.obj) is PluginWrapper else self.obj #the wrapper proxies `__class__`
+        return has_change_hint(_obj)
     pass
 
 class PluginWrapper:
-    def __init__(self, entry):
-        self.root = Path.cwd()
+    def __init__(self, entry, root=None):
+        self.root = Path(root) if root else Path.cwd()
         ##
         if entry.endswith('.py'):
             self.load_python(entry)
@@ -77,8 +103,10 @@ class PluginWrapper:
 
     def __getattribute__(self, name):
         try:
-            _func = getattr(self.obj, name)
-            _func = self.wrap_call_in_workspace(_func)
+            ## bypass itself for `obj`, or each lookup recurses to the limit
+            _func = getattr(super().__getattribute__('obj'), name)
+            if callable(_func):
+                _func = self.wrap_call_in_workspace(_func)
             return _func
         except:
             return super().__getattribute__(name)
@@ -93,15 +121,6 @@ class PluginWrapper:
             return func( *args )
         return _wrap
 
-    @staticmethod
-    def wrap_call_in_process(func):
-        @wraps(func)
-        def _wrap(*args, **kwargs):
-            with mp.Pool() as pool:
-                handle = pool.apply_async(func, args=args, kwds=kwargs)
-                return handle.get(timeout=None) # remote exception may raise here
-        return _wrap
-
     def wrap_call_in_workspace(self, func):
         @wraps(func)
         def _wrap(*args, **kwargs):
@@ -116,7 +135,11 @@ class PluginWrapper:
         module_name = Path(entry).stem
         if module_name in sys.modules:
             sys.modules.pop(module_name)
-        self._module = import_module(module_name)
+        ## load from the absolute path, `sys.path` is shared with the running plugins
+        _spec = spec_from_file_location( module_name, POSIX(self.root / entry) )
+        self._module = module_from_spec(_spec)
+        sys.modules[module_name] = self._module
+        _spec.loader.exec_module(self._module)
         ##
         for _,obj in inspect.getmembers(self._module):
             if inspect.isclass(obj) and issubclass(obj, SRC_API) and (obj is not SRC_API):
@@ -146,11 +169,30 @@ class PluginManager:
         if cm:
             self.cm = cm
         else:
-            self.cm = CapabilityManager()
+            self.cm = C_MAN.CapabilityManager()
         self.root.mkdir(exist_ok=True, parents=True) #ensure root existing
+        self.listeners = list()
+        self.workers = dict()
+        pass
+
+    def getWorker(self, name:str, isolation:str) -> PluginWorker:
+        group = name if isolation==ISOLATION_PROCESS else isolation
+        if group not in self.workers:
+            self.workers[group] = PluginWorker(group)
+        return self.workers[group]
+
+    def shutdown(self):
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers.clear()
+        pass
+
+    def notify(self, name):
+        for callback in self.listeners:
+            callback(name)
         pass
 
-    def test_config(self, config) -> ERR:
+    def test_config(self, config, root='.') -> ERR:
         # test required config fields
         for key in REQUIRED_FIELDS:
             if key not in config:
@@ -159,7 +201,7 @@ class PluginManager:
         if not (config['main'].endswith('.py') or config['main'].endswith('.so')):
             return ERR.CONFIG_MAIN_ENTRY_ILLEGAL
         # test whether main entry is provided
-        _pre_built = Path(PLUGIN_BUILD_LEVEL, config['main']).exists()
+        _pre_built = Path(root, PLUGIN_BUILD_LEVEL, config['main']).exists()
         _post_built= ('scripts' in config) and ('pre-install' in config['scripts'])
         if not (_pre_built or _post_built):
             return ERR.CONFIG_MAIN_ENTRY_MISSING
@@ -179,10 +221,12 @@ class PluginManager:
         # all test pass
         return ERR.ALL_CLEAN
 
-    def getInstalledPlugin(self, name, required_version=None) -> MetaPlugin:
+    def resolvePlugin(self, name, required_version=None) -> str:
         _installed = list(sorted(self.root.glob( '%s-*.*'%name ), reverse=True))
         # select the only plugin
-        _selected  = None
+        _selected  = ''
+        if not _installed:
+            return _selected
         if not required_version:
             _selected = _installed[0].name
         else:
@@ -193,20 +237,43 @@ class PluginManager:
                     _selected = item.name
                     break
             pass
+        return _selected
+
+    def installedStamp(self, selected:str) -> tuple:
+        ## changes on every (re-)install, also by the other processes
+        if not selected:
+            return ()
+        try:
+            _st = (self.root / selected).stat()
+            return (_st.st_ino, _st.st_ctime_ns)
+        except OSError:
+            return ()
+
+    def getInstalledPlugin(self, name, required_version=None) -> MetaPlugin:
+        _selected = self.resolvePlugin(name, required_version)
         if not _selected:
             return ERR.PLUGIN_LOAD_FAILED # type: ignore
+        ## avoid the relative paths, the plugins may be loaded along with running ones
+        _root = self.root / _selected
+        _config = json_load( POSIX(_root / CONFIG_FILENAME) )
+        ret = self.test_config(_config, _root)
+        if ret is not ERR.ALL_CLEAN:
+            return ret # type: ignore
         #
-        with WorkSpace(self.root, _selected) as ws:
-            _config = json_load(CONFIG_FILENAME)
-            ret = self.test_config(_config)
-            if ret!=True:
-                return ret # type: ignore
-            pass
+        _isolation = _config.get('isolation', ISOLATION_THREAD)
+        if _isolation!=ISOLATION_THREAD:
+            ## host the plugin in a long-lived worker process
+            try:
+                _worker = self.getWorker(name, _isolation)
+                _obj = _worker.load( name, POSIX(_root / PLUGIN_BUILD_LEVEL), _config['main'] )
+                return MetaPlugin( name, _obj, _config )
+            except Exception as e:
+                return ERR.PLUGIN_WRAPPER_FAILED # type: ignore
         #
-        with WorkSpace(self.root, _selected, PLUGIN_BUILD_LEVEL) as ws:
+        with WorkSpace(_root, PLUGIN_BUILD_LEVEL) as ws:
             try:
-                _obj = PluginWrapper(_config['main'])
-                _plugin = MetaPlugin( name, _obj )
+                _obj = PluginWrapper(_config['main'], _root / PLUGIN_BUILD_LEVEL)
+                _plugin = MetaPlugin( name, _obj, _config )
             except Exception as e:
                 return ERR.PLUGIN_WRAPPER_FAILED # type: ignore
             pass
@@ -247,7 +314,7 @@ class PluginManager:
                 try:
                     _config = json_load(CONFIG_FILENAME)
                     ret = self.test_config(_config)
-                    if ret!=True:
+                    if ret is not ERR.ALL_CLEAN:
                         return ret
                 except Exception as e:
                     return ERR.CONFIG_FILE_MISSING
@@ -275,6 +342,7 @@ class PluginManager:
             _new_name = _config['name']+'-'+_config['version']
             shutil.move( POSIX(tmp_dir), POSIX(self.root / _new_name) )
             print('Plugin installed: %s'%_new_name)
+            self.notify( _config['name'] )
             #NOTE: disable 'post-install' for safety issue
             # with WorkSpace(self.root) as ws:
             #     if ('scripts' in _config) and ('post-install' in _config['scripts']):
@@ -292,6 +360,7 @@ class PluginManager:
                     _version = _regex.findall(item.name)[0]
                     shutil.rmtree(item)
                     print('Removed plugin: %s'%item.name)
+                self.notify(name)
                 pass
             pass
         return ERR.ALL_CLEAN #always
@@ -1,4 +1,4 @@
 __all__ = [
-    'manager', 'utils', 'errcode',
+    'manager', 'utils', 'errcode', 'scheduler', 'profiler', 'service', 'benchmark', 'worker', 'autosave', 'generation', 'codec', 'watcher', 'process',
     'ApplicationManager', 'CapabilityManager', 'DomainManager', 'PluginManager'
 ]
\ No newline at end of file
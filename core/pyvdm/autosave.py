@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import threading
+import time
+
+from pyvdm.core.errcode import DomainCode
+
+AUTOSAVE_POLICY = {
+    'poll': 2,              #the interval to poll the signals (in seconds)
+    'debounce': 5,          #save after the signals stay quiet for (in seconds)
+    'max_staleness': 300,   #save anyway after the first change (in seconds)
+    'hint_interval': 30,    #the interval to ask the plugins `onChanged` (in seconds)
+}
+
+class AutosaveEngine:
+    """Save the open domain only when it is dirty.
+
+    The cheap signals are polled from the core: the processes in the domain
+    PID namespace and their windows (created, closed, moved or resized)
+    mark the application plugins dirty, the current desktop the global
+    plugin; the `onChanged` hints mark the plugin itself. A save is issued
+    once the signals stay quiet for `debounce` seconds, or `max_staleness`
+    seconds after the first unsaved change. A failed save keeps the changes
+    pending, and is retried after `debounce` seconds.
+    """
+    def __init__(self, core, **policy):
+        self.core = core
+        self.policy = { **AUTOSAVE_POLICY, **policy }
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.reset('')
+        pass
+
+    def reset(self, name:str):
+        self.name = name
+        self.dirty = set()
+        self.first_dirty, self.last_event = None, None
+        self.last_save = self.last_hint = time.monotonic()
+        self.last_attempt = None
+        self.signatures = dict()
+        pass
+
+    def mark_dirty(self, names, event=True):
+        _now = time.monotonic()
+        self.dirty.update(names)
+        self.first_dirty = self.first_dirty or _now
+        if event or not self.last_event:
+            self.last_event = _now
+        pass
+
+    def poll_signals(self):
+        _tracker = self.core.dm.tracker()
+        _plugins = { x.name:x for x in self.core.plugins }
+        _apps = set(self.core.app_plugins)
+        _xm = self.core.global_plugin.xm
+        def _windows():
+            ## the windows of the processes polled just before
+            return frozenset( (w['xid'], w['desktop'], tuple(w['states']), tuple(w['xyhw']))
+                              for pid in self.signatures.get('processes', ()) for w in _xm.get_windows_by_pid(pid) )
+        ## (signal, targets) -> the current signature, in the polling order
+        sources = {
+            'processes': (lambda: frozenset(_tracker.pids()), _apps),
+            'windows':   (_windows, _apps),
+            'desktop':   (lambda: _xm.get_current_desktop(), {'global'}),
+        }
+        for key,(_source,_targets) in sources.items():
+            try:
+                _signature = _source()
+            except Exception:
+                continue #the signal is not available
+            if key in self.signatures and self.signatures[key]!=_signature:
+                self.mark_dirty(_targets)
+            self.signatures[key] = _signature
+        ## the plugin-reported change hints, the plugins without are saved along with the stale saves
+        if time.monotonic()-self.last_hint >= self.policy['hint_interval']:
+            self.last_hint = time.monotonic()
+            _hinted = lambda x: getattr(x, 'hinted', False) #never the default `onChanged`
+            _changed = [ k for k,v in _plugins.items() if k not in _apps and _hinted(v) and v.onChanged()!=0 ]
+            if _changed: self.mark_dirty(_changed, event=False)
+        pass
+
+    def due(self) -> str:
+        _now = time.monotonic()
+        if self.last_attempt and _now-self.last_attempt < self.policy['debounce']:
+            return '' #back off after a failed save
+        if self.dirty and _now-self.last_event >= self.policy['debounce']:
+            return 'dirty'
+        if self.first_dirty and _now-self.first_dirty >= self.policy['max_staleness']:
+            return 'stale'
+        return ''
+
+    def step(self):
+        _name = self.core.dm.open_domain_name
+        if _name!=self.name:
+            self.reset(_name)
+        if not _name:
+            return None
+        ##
+        self.poll_signals()
+        _reason = self.due()
+        if not _reason:
+            return None
+        ## skip when a domain operation is running, retry in the next poll
+        if not self.core.lock.acquire(blocking=False):
+            return None
+        try:
+            _names = list(self.dirty) if _reason=='dirty' else None
+            ret = self.core.save_domain(incremental=True, names=_names)
+        finally:
+            self.core.lock.release()
+        ## never drop the pending changes on failure, nor with the stragglers not committed
+        if ret[0] is not DomainCode.ALL_CLEAN:
+            self.last_attempt = time.monotonic()
+            return ret
+        self.dirty.clear()
+        self.first_dirty, self.last_event = None, None
+        self.last_save, self.last_attempt = time.monotonic(), None
+        return ret
+
+    def run(self):
+        while not self.stop_event.wait( self.policy['poll'] ):
+            try:
+                self.step()
+            except Exception as e:
+                print(f'Autosave failed: {e}')
+        pass
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name='vdm-autosave', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread: self.thread.join()
+        self.thread = None
+        pass
+
+    pass
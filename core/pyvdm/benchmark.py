@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+from pathlib import Path
+import random
+import shutil
+import statistics
+import subprocess as sp
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import pyvdm.core.manager as M
+import pyvdm.core.DomainManager as D_MAN
+from pyvdm.core.codec import (OFFLOAD_MAX_WORKERS, CryptoOffload, _fernet, dump_legacy, dump_records, load_records)
+from pyvdm.core.utils import (POSIX, StatFile, json_dump, lazy_import)
+from pyvdm.core.errcode import DomainCode
+
+PARENT_ROOT = Path('~/.vdm').expanduser()
+BASELINE_FILENAME = 'benchmark.json'
+DEFAULT_TOLERANCE = 1.5 #allowed ratio over the baseline
+IMPORT_TARGETS = ['pyvdm.core.manager', 'pyvdm.core.utils', 'pyvdm.core.DomainManager']
+HEAVY_MODULES = ['dbus', 'psutil', 'requests', 'termcolor', 'cryptography',
+                 'keyring', 'crypt', 'pyvdm.daemon.vdm_capability_daemon']
+
+LIFECYCLE_OPERATIONS = ['open_domain', 'save_domain', 'close_domain', 'switch_domain']
+CODEC_WORDS = ['vdm', 'domain', 'session', 'window', 'tab', 'history', 'docs', 'search', 'index', 'main']
+
+_MOCK_PLUGIN = '''
+import time
+from pyvdm.interface import SRC_API
+
+def _cost():
+    _end = time.perf_counter() + {cpu}
+    while time.perf_counter() < _end: pass
+    time.sleep({wall})
+
+class MockPlugin(SRC_API):
+    def onStart(self):
+        _cost(); return 0
+    def onStop(self):
+        _cost(); return 0
+    def onClose(self):
+        _cost(); return 0
+    def onSave(self, stat_file):
+        _cost()
+        with open(stat_file, 'w') as f:
+            f.write( 'x'*{size} )
+        return 0
+    def onResume(self, stat_file, new=False):
+        _cost()
+        with open(stat_file, 'r') as f:
+            f.read()
+        return 0
+'''
+
+_IMPORT_PROBE = '''
+import json, sys, time
+_start = time.perf_counter()
+import {target}
+_cost = time.perf_counter() - _start
+print( json.dumps({{'time':_cost, 'modules':[x for x in {heavy!r} if x in sys.modules]}}) )
+'''
+
+def _percentile(values:list, ratio:float) -> float:
+    if not values: return 0.0
+    values = sorted(values)
+    return values[ min(len(values)-1, int(ratio*len(values))) ]
+
+class FakeX11Manager:
+    """In-process stand-in for the `x11-manager` capability."""
+    def __init__(self):
+        self.desktop = 0
+        self.windows = dict()
+
+    def get_current_desktop(self):
+        return self.desktop
+
+    def set_current_desktop(self, desktop):
+        self.desktop = desktop
+
+    def get_windows_by_pid(self, pid):
+        return [ x for x in self.windows.values() if x['pid']==pid ]
+
+    def get_windows_by_xid(self, xid):
+        return [ self.windows[xid] ] if xid in self.windows else []
+
+    def set_window_by_xid(self, xid, desktop, states, xyhw):
+        self.windows.setdefault(xid, {'xid':xid, 'pid':0}).update(
+            {'desktop':desktop, 'states':states, 'xyhw':xyhw} )
+
+    pass
+
+def install_fake_capability():
+    import pyvdm.interface
+    _module = types.ModuleType('pyvdm.interface.CapabilityLibrary')
+    _module.CapabilityHandleLocal = lambda name: FakeX11Manager()
+    sys.modules[ _module.__name__ ] = _module
+    pyvdm.interface.CapabilityLibrary = _module
+    pass
+
+class BenchDomainManager(D_MAN.DomainManager):
+    """Domain manager without the namespace and overlay setup."""
+    def prepare_domain(self, name:str) -> tuple:
+        return (DomainCode.ALL_CLEAN, {'name':name, 'ppid':os.getpid(), 'pid':os.getpid()})
+
+    def discard_domain(self, prepared:dict):
+        if prepared and self.open_domain_name==prepared['name']:
+            self.stat.putStat('')
+        pass
+
+    def finalize_domain(self, stat:dict=None):
+        if not stat or self.open_domain_name==stat['name']:
+            self.stat.putStat('')
+        pass
+
+    pass
+
+class BenchCoreManager(M.CoreManager):
+    def __init__(self, root):
+        super().__init__(root)
+        self.dm = BenchDomainManager( POSIX(self.root), self.am )
+        pass
+
+    pass
+
+def generate_domains(root, domains=2, apps=4, plugins=4, wall=0.0, cpu=0.0, size=1024, isolation='thread') -> tuple:
+    """Generate the domains with `apps` applications and `plugins` plugins each."""
+    root = Path(root)
+    _source = _MOCK_PLUGIN.format(wall=wall, cpu=cpu, size=size)
+    def _install(name, target=None):
+        _path = root / 'plugins' / f'{name}-0.0.1' / M.P_MAN.PLUGIN_BUILD_LEVEL
+        _path.mkdir(parents=True, exist_ok=True)
+        (_path / f'{name.replace("-","_")}.py').write_text(_source)
+        _config = {'name':name, 'version':'0.0.1', 'author':'vdm', 'license':'MIT',
+                   'main':f'{name.replace("-","_")}.py'}
+        if target: _config['target'] = target
+        if isolation!='thread': _config['isolation'] = isolation
+        json_dump( POSIX(_path.parent / M.P_MAN.CONFIG_FILENAME), _config )
+    ##
+    names, applications = list(), dict()
+    for i in range(domains):
+        name = f'bench-{i}'
+        config = {'name':name, 'plugins':{}, 'applications':[],
+                  'created_time':int(time.time()), 'last_update_time':int(time.time())}
+        for j in range(apps):
+            _app = f'bench-app-{i}-{j}'
+            _install(f'bench-app-plugin-{i}-{j}', _app)
+            applications[_app] = {'name':_app, 'exec':_app, 'icon':'', 'path':'',
+                                  'compatible':f'bench-app-plugin-{i}-{j}'}
+            config['applications'].append(_app)
+        for j in range(plugins):
+            _install(f'bench-plugin-{i}-{j}')
+            config['plugins'][f'bench-plugin-{i}-{j}'] = '0.0.1'
+        (root / 'domains' / name).mkdir(parents=True, exist_ok=True)
+        json_dump( POSIX(root / 'domains' / name / D_MAN.CONFIG_FILENAME), config )
+        names.append(name)
+    return names, applications
+
+def bench_lifecycle(rounds=10, domains=2, apps=4, plugins=4, wall=0.0, cpu=0.0, size=1024, isolation='thread') -> dict:
+    install_fake_capability()
+    _root = tempfile.mkdtemp(prefix='vdm-benchmark-')
+    samples = { x:list() for x in LIFECYCLE_OPERATIONS }
+    try:
+        names, applications = generate_domains(_root, domains, apps, plugins, wall, cpu, size, isolation)
+        core = BenchCoreManager(_root)
+        core.am.applications = applications #skip the desktop entries scanning
+        def _measure(op, *args):
+            _start = time.perf_counter()
+            ret = getattr(core, op)(*args)
+            samples[op].append( time.perf_counter()-_start )
+            if ret is not True and ret[0] not in (DomainCode.ALL_CLEAN, DomainCode.DOMAIN_PLUGIN_TIMEOUT):
+                raise Exception( f'{op} failed: {ret}' )
+        ##
+        for _ in range(rounds):
+            _measure('open_domain', names[0])
+            _measure('save_domain')
+            _measure('close_domain')
+        _measure('open_domain', names[0])
+        for idx in range(rounds):
+            _measure('switch_domain', names[ (idx+1)%len(names) ])
+        _measure('close_domain')
+        core.shutdown()
+    finally:
+        shutil.rmtree(_root, ignore_errors=True)
+    ##
+    result = dict()
+    for op,values in samples.items():
+        result[op] = {
+            'p50_ms': _percentile(values, 0.50)*1E3,
+            'p90_ms': _percentile(values, 0.90)*1E3,
+            'p99_ms': _percentile(values, 0.99)*1E3,
+            'ops_per_sec': len(values)/sum(values) if sum(values) else 0.0,
+        }
+    return result
+
+def generate_records(size=16, record_size=256) -> list:
+    ## browser-like session blobs, `size` MB in total of `record_size` KB each
+    _random = random.Random(0)
+    _url = lambda: 'https://' + '/'.join( _random.choices(CODEC_WORDS, k=6) ) + f'?id={_random.getrandbits(32)}'
+    records = list()
+    for idx in range( max(1, size*1024//record_size) ):
+        _tabs, _size = list(), 0
+        while _size < record_size*1024:
+            _tabs.append({ 'url':_url(), 'title':' '.join(_random.choices(CODEC_WORDS, k=8)),
+                           'scroll':_random.randint(0, 1E5) })
+            _size += len(_tabs[-1]['url']) + 80
+        records.append({
+            'stat': json.dumps({'tabs':_tabs}),
+            'window': {'desktop':idx%4, 'states':[], 'xyhw':[0, 0, 800, 600]},
+        })
+    return records
+
+def bench_codec(size=16, repeat=3, encrypt=True) -> dict:
+    records = generate_records(size)
+    key = lazy_import('cryptography.fernet').Fernet.generate_key() if encrypt else None
+    _plain_mb = sum( len(json.dumps(x))+1 for x in records )/1024**2
+    _root = tempfile.mkdtemp(prefix='vdm-benchmark-')
+    offload = CryptoOffload( max(2, OFFLOAD_MAX_WORKERS) ) #measured even on single core
+    ##
+    def _legacy_dump(stat_file):
+        data = json.dumps(records).encode()
+        with open(stat_file, 'wb') as f:
+            f.write( _fernet(key).encrypt(data) if key else data )
+    def _legacy_load(stat_file):
+        with open(stat_file, 'rb') as f:
+            data = f.read().strip()
+        return json.loads( _fernet(key).decrypt(data) if key else data )
+    _load = lambda x: list(load_records(x, key))
+    encodings = {
+        'legacy':         (_legacy_dump, _legacy_load),
+        'legacy_offload': (lambda x: dump_legacy(records, x, key, offload), _load),
+        'stream':         (lambda x: dump_records(records, x, key, compress=False), _load),
+        'compressed':     (lambda x: dump_records(records, x, key, compress=True), _load),
+        'offload':        (lambda x: dump_records(records, x, key, compress=True, offload=offload), _load),
+    }
+    result = dict()
+    try:
+        offload.submit(b'').result() #exclude the pool startup
+        for name,(_dump,_load) in encodings.items():
+            _file = POSIX(Path(_root) / f'{name}.stat')
+            _samples = { 'encode':list(), 'decode':list() }
+            _peaks = dict()
+            for op,fn in [('encode',_dump), ('decode',_load)]:
+                for _ in range(repeat):
+                    _start = time.perf_counter()
+                    fn(_file)
+                    _samples[op].append( time.perf_counter()-_start )
+                ## the peak memory in a separate traced run
+                tracemalloc.start()
+                fn(_file)
+                _peaks[op] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            assert( _load(_file)==records )
+            _encode, _decode = statistics.median(_samples['encode']), statistics.median(_samples['decode'])
+            result[name] = {
+                'encode_ms': _encode*1E3,
+                'decode_ms': _decode*1E3,
+                'encode_mb_s': _plain_mb/_encode,
+                'decode_mb_s': _plain_mb/_decode,
+                'encode_peak_mb': _peaks['encode']/1024**2,
+                'decode_peak_mb': _peaks['decode']/1024**2,
+                'file_mb': os.path.getsize(_file)/1024**2,
+            }
+    finally:
+        offload.shutdown()
+        shutil.rmtree(_root, ignore_errors=True)
+    return result
+
+_AUDIT_COUNTS = None
+
+def _audit_hook(event, args):
+    if _AUDIT_COUNTS is not None and event in _AUDIT_COUNTS:
+        _AUDIT_COUNTS[event] += 1
+    pass
+
+def bench_idle(ticks=1000, readers=4) -> dict:
+    ## the GUI idle: each refresh tick queries the open domain from `readers` widgets
+    global _AUDIT_COUNTS
+    sys.addaudithook(_audit_hook) #never removed, inactive out of the counting
+    _root = tempfile.mkdtemp(prefix='vdm-benchmark-')
+    accessors = {
+        'uncached': lambda stat: stat.readStat()['name'],
+        'cached':   lambda stat: stat.getStat()['name'],
+    }
+    result = dict()
+    try:
+        stat = StatFile(_root)
+        stat.putStat('bench-0', ppid=1, pid=2)
+        for name,_access in accessors.items():
+            _AUDIT_COUNTS = {'open':0}
+            _start = time.perf_counter()
+            for _ in range(ticks):
+                for _ in range(readers):
+                    _access(stat)
+            _cost = time.perf_counter() - _start
+            _opens, _AUDIT_COUNTS = _AUDIT_COUNTS['open'], None
+            result[name] = {
+                'us_per_access': _cost/(ticks*readers)*1E6,
+                'opens_per_tick': _opens/ticks,
+            }
+        ## the writer invalidates the readers
+        stat.putStat('bench-1', ppid=1, pid=2)
+        assert( stat.getStat()['name']=='bench-1' )
+    finally:
+        _AUDIT_COUNTS = None
+        shutil.rmtree(_root, ignore_errors=True)
+    return result
+
+def load_baseline(root=PARENT_ROOT) -> dict:
+    try:
+        with open(POSIX(Path(root)/BASELINE_FILENAME), 'r') as fd:
+            return json.load(fd)
+    except:
+        return dict()
+
+def save_baseline(suite:str, result:dict, root=PARENT_ROOT):
+    root = Path(root)
+    baseline = load_baseline(root)
+    baseline[suite] = result
+    root.mkdir(parents=True, exist_ok=True)
+    _fd, _tmp = tempfile.mkstemp(dir=POSIX(root))
+    with os.fdopen(_fd, 'w') as fd:
+        json.dump(baseline, fd, indent=4)
+    os.replace(_tmp, POSIX(root/BASELINE_FILENAME))
+    pass
+
+def compare(result:dict, baseline:dict, tolerance=DEFAULT_TOLERANCE) -> list:
+    """Return the `(key, value, baseline)` regressed over the tolerance."""
+    regressions = list()
+    for key,value in result.items():
+        if isinstance(value, dict):
+            regressions.extend([ (f'{key}.{k}',v,b) for k,v,b in compare(value, baseline.get(key,{}), tolerance) ])
+        elif isinstance(value, (int,float)) and isinstance(baseline.get(key), (int,float)):
+            _value, _base = value, baseline[key]
+            if key.startswith('ops_per_sec') or key.endswith('_mb_s'): #higher is better
+                _value, _base = _base, value
+            if _base>0 and _value > _base*tolerance:
+                regressions.append( (key, value, baseline[key]) )
+    return regressions
+
+def bench_import(repeat=5) -> dict:
+    result = dict()
+    for target in IMPORT_TARGETS:
+        _code = _IMPORT_PROBE.format(target=target, heavy=HEAVY_MODULES)
+        _samples, _modules = list(), set()
+        for _ in range(repeat):
+            _output = sp.check_output([sys.executable, '-c', _code])
+            _probe = json.loads( _output.decode().strip().splitlines()[-1] )
+            _samples.append( _probe['time'] )
+            _modules.update( _probe['modules'] )
+        result[target] = {
+            'median_ms': statistics.median(_samples)*1E3,
+            'min_ms': min(_samples)*1E3,
+            'heavy_modules': sorted(_modules),
+        }
+    return result
+
+def report(suite:str, result:dict, args) -> bool:
+    """Print the result against the stored baseline, return False on regression."""
+    print( json.dumps(result, indent=4) )
+    passed = True
+    ## eager heavy imports are always a regression
+    for target,item in result.items():
+        if isinstance(item, dict) and item.get('heavy_modules'):
+            print( f'[FAIL] "{target}" eagerly imports: {", ".join(item["heavy_modules"])}.' )
+            passed = False
+    ##
+    baseline = load_baseline().get(suite)
+    if baseline:
+        for key,value,_base in compare(result, baseline, args.tolerance):
+            print( f'[FAIL] {suite}: "{key}" regressed from {_base:.3f} to {value:.3f}.' )
+            passed = False
+    if getattr(args, 'update', False):
+        save_baseline(suite, result)
+        print( f'Baseline of "{suite}" updated.' )
+    return passed
+
+def execute(command, args, verbose=False):
+    if command=='import':
+        return report('import', bench_import(args.repeat), args)
+    elif command=='lifecycle':
+        _suite = f'lifecycle-d{args.domains}-a{args.apps}-p{args.plugins}-w{args.wall}-c{args.cpu}-s{args.size}'
+        _suite += '' if args.isolation=='thread' else f'-{args.isolation}'
+        result = bench_lifecycle(args.rounds, args.domains, args.apps, args.plugins,
+                                 args.wall/1E3, args.cpu/1E3, args.size, args.isolation)
+        return report(_suite, result, args)
+    elif command=='idle':
+        return report(f'idle-r{args.readers}', bench_idle(args.ticks, args.readers), args)
+    elif command=='codec':
+        _suite = f'codec-s{args.size}' + ('' if args.encrypt else '-plain')
+        return report(_suite, bench_codec(args.size, args.repeat, args.encrypt), args)
+    else:
+        print('The command <{}> is not supported.'.format(command))
+    return
+
+def init_subparsers(subparsers):
+    p_import = subparsers.add_parser('import',
+        help='measure the import time of the CLI modules.')
+    p_import.add_argument('--repeat', type=int, default=5,
+        help='the number of fresh interpreters per module.')
+    #
+    p_lifecycle = subparsers.add_parser('lifecycle',
+        help='measure the domain lifecycle with mock plugins.')
+    p_lifecycle.add_argument('--rounds', type=int, default=10,
+        help='the number of open/save/close rounds and switches.')
+    p_lifecycle.add_argument('--domains', type=int, default=2,
+        help='the number of synthetic domains.')
+    p_lifecycle.add_argument('--apps', type=int, default=4,
+        help='the number of applications per domain.')
+    p_lifecycle.add_argument('--plugins', type=int, default=4,
+        help='the number of plugins per domain.')
+    p_lifecycle.add_argument('--wall', type=float, default=0.0,
+        help='the blocking cost of each plugin call (in ms).')
+    p_lifecycle.add_argument('--cpu', type=float, default=0.0,
+        help='the CPU cost of each plugin call (in ms).')
+    p_lifecycle.add_argument('--size', type=int, default=1024,
+        help='the stat file size written by each plugin (in bytes).')
+    p_lifecycle.add_argument('--isolation', default='thread',
+        help='the isolation of the mock plugins: thread, process or a worker group.')
+    #
+    p_codec = subparsers.add_parser('codec',
+        help='measure the stat encodings on synthetic large payloads.')
+    p_codec.add_argument('--size', type=int, default=16,
+        help='the payload size (in MB).')
+    p_codec.add_argument('--repeat', type=int, default=3,
+        help='the number of encode/decode rounds.')
+    p_codec.add_argument('--no-encrypt', dest='encrypt', action='store_false',
+        help='measure the encodings without encryption.')
+    #
+    p_idle = subparsers.add_parser('idle',
+        help='measure the open domain queries of the idle GUI.')
+    p_idle.add_argument('--ticks', type=int, default=1000,
+        help='the number of refresh ticks.')
+    p_idle.add_argument('--readers', type=int, default=4,
+        help='the number of queries per tick.')
+    #
+    for p in [p_import, p_lifecycle, p_codec, p_idle]:
+        p.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+            help='the allowed ratio over the stored baseline.')
+        p.add_argument('--update', action='store_true',
+            help='store the result as the new baseline.')
+    pass
+
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(
+            description='VDM Benchmark.')
+        subparsers = parser.add_subparsers(dest='command')
+        init_subparsers(subparsers)
+        #
+        args = parser.parse_args()
+        ret = execute(args.command, args)
+        if ret==False:
+            exit(1)
+    except Exception as e:
+        raise e#pass
+    finally:
+        pass#exit()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import functools
+import json
+import os
+import struct
+import threading
+import zlib
+
+from pyvdm.core.utils import (POSIX, lazy_import)
+from pyvdm.core.worker import SPAWN_CONTEXT
+
+STAT_MAGIC = b'VDMS'
+STAT_VERSION = 1
+FLAG_COMPRESSED = 0x01
+FLAG_ENCRYPTED  = 0x02
+FLAG_FRAMED     = 0x04  #each frame is an independent zlib stream
+CHUNK_SIZE = 256*1024   #the plain bytes per frame
+COMPRESS_LEVEL = 1
+OFFLOAD_MAX_WORKERS = min(4, (os.cpu_count() or 1)-1) #leave one core to the core, none on single core
+
+_HEADER = struct.Struct('>4sBB')  #magic, version, flags
+_FRAME  = struct.Struct('>I')     #the frame length
+
+## Stream layout: header, then length-prefixed frames of one zlib stream,
+## each frame sync-flushed and encrypted on its own; or with `FLAG_FRAMED`,
+## frames compressed independently to be encoded in parallel. The records
+## are JSON lines, so neither side holds the whole record list in memory.
+
+@contextmanager
+def _opened(stat_file, mode:str):
+    ## the path, or the file object of the buffer-based stat exchange (owned by the caller)
+    if isinstance(stat_file, (str, os.PathLike)):
+        with open(POSIX(stat_file), mode) as fd:
+            yield fd
+    else:
+        yield stat_file
+    pass
+
+def is_empty(stat_file) -> bool:
+    if isinstance(stat_file, (str, os.PathLike)):
+        return os.stat( POSIX(stat_file) ).st_size==0
+    return os.fstat( stat_file.fileno() ).st_size==0
+
+@functools.lru_cache(maxsize=64)
+def _fernet(key:bytes):
+    return lazy_import('cryptography.fernet').Fernet(key)
+
+def encode_frame(data:bytes, key=None, compress=True, level=COMPRESS_LEVEL) -> bytes:
+    ## one independent frame, run in the offload processes
+    if compress:
+        data = zlib.compress(data, level)
+    if key:
+        data = _fernet(key).encrypt(data)
+    return data
+
+class CryptoOffload:
+    """Encode the frames in a small process pool, off the GIL of the core.
+
+    `submit` returns a future of the encoded frame, so the caller keeps
+    collecting the next records while the previous ones are encrypted. The
+    legacy layout (the default without `compress_stats`) is one token, so
+    it is only moved off the core, never encrypted in parallel.
+    """
+    def __init__(self, max_workers=OFFLOAD_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.pool = None
+        pass
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def submit(self, data:bytes, key=None, compress=True, level=COMPRESS_LEVEL):
+        with self.lock:
+            if not self.pool:
+                self.pool = ProcessPoolExecutor(self.max_workers, mp_context=SPAWN_CONTEXT)
+        return self.pool.submit(encode_frame, data, key, compress, level)
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        pass
+
+    pass
+
+GLOBAL_OFFLOAD = CryptoOffload()
+
+class FrameEncoder:
+    def __init__(self, fd, key=None, compress=True, level=COMPRESS_LEVEL, offload=None):
+        self.fd = fd
+        self.key = key
+        self.compress, self.level = compress, level
+        self.offload = offload if offload and offload.enabled else None
+        self.compressor = zlib.compressobj(level) if compress and not self.offload else None
+        self.pending = collections.deque() #the offloaded frames, in order
+        self.buffer = bytearray()
+        _flags = (FLAG_COMPRESSED if compress else 0) | (FLAG_ENCRYPTED if key else 0) | (FLAG_FRAMED if self.offload else 0)
+        self.fd.write( _HEADER.pack(STAT_MAGIC, STAT_VERSION, _flags) )
+        pass
+
+    def __write(self, data:bytes):
+        if not data:
+            return
+        self.fd.write( _FRAME.pack(len(data)) )
+        self.fd.write( data )
+        pass
+
+    def __frame(self, data:bytes, final=False):
+        if self.offload:
+            ## bounded in flight, the oldest frame is written first
+            if len(self.pending) >= 2*self.offload.max_workers:
+                self.__write( self.pending.popleft().result() )
+            if data:
+                self.pending.append( self.offload.submit(data, self.key, self.compress, self.level) )
+            return
+        if self.compressor:
+            data = self.compressor.compress(data)
+            data += self.compressor.flush( zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH )
+        if data and self.key:
+            data = _fernet(self.key).encrypt(data)
+        self.__write(data)
+        pass
+
+    def write(self, data:bytes):
+        self.buffer += data
+        while len(self.buffer) >= CHUNK_SIZE:
+            self.__frame( bytes(self.buffer[:CHUNK_SIZE]) )
+            del self.buffer[:CHUNK_SIZE]
+        pass
+
+    def close(self):
+        if self.offload and not self.pending:
+            ## too small to pay for the round trip
+            self.__write( encode_frame(bytes(self.buffer), self.key, self.compress, self.level) )
+        else:
+            self.__frame( bytes(self.buffer), final=True )
+        while self.pending:
+            self.__write( self.pending.popleft().result() )
+        self.buffer = bytearray()
+        pass
+
+    pass
+
+def _iter_frames(fd, flags:int, key=None):
+    if flags & FLAG_ENCRYPTED and not key:
+        raise ValueError('The stat file is encrypted.')
+    _decompressor = zlib.decompressobj() if flags & FLAG_COMPRESSED else None
+    while True:
+        _length = fd.read(_FRAME.size)
+        if not _length:
+            break
+        data = fd.read( _FRAME.unpack(_length)[0] )
+        if flags & FLAG_ENCRYPTED:
+            data = _fernet(key).decrypt(data)
+        if flags & FLAG_COMPRESSED and flags & FLAG_FRAMED:
+            data = zlib.decompress(data)
+        elif _decompressor:
+            data = _decompressor.decompress(data)
+        yield data
+    pass
+
+def dump_records(records, stat_file, key=None, compress=True, offload=None):
+    """Stream the records into `stat_file`, as JSON lines.
+
+    The records may be a generator, which is consumed while the previous
+    frames are still encoded by `offload`.
+    """
+    with _opened(stat_file, 'wb') as fd:
+        encoder = FrameEncoder(fd, key, compress, offload=offload)
+        for item in records:
+            encoder.write( json.dumps(item).encode() + b'\n' )
+        encoder.close()
+    pass
+
+def dump_legacy(records, stat_file, key=None, offload=None):
+    """Write the records as the whole JSON list, readable by the older releases.
+
+    The single token of a large list is encrypted by `offload`, never on the
+    thread of the core.
+    """
+    data = json.dumps( list(records) ).encode()
+    if key and offload and offload.enabled and len(data) >= CHUNK_SIZE:
+        data = offload.submit(data, key, compress=False).result()
+    elif key:
+        data = _fernet(key).encrypt(data)
+    with _opened(stat_file, 'wb') as fd:
+        fd.write(data)
+    pass
+
+def load_records(stat_file, key=None):
+    """Iterate the records of `stat_file`, negotiated by the header.
+
+    The stat files without the header are the whole JSON list, encrypted as
+    one Fernet token if `key` is given.
+    """
+    with _opened(stat_file, 'rb') as fd:
+        _header = fd.read(_HEADER.size)
+        if len(_header)==_HEADER.size and _header[:len(STAT_MAGIC)]==STAT_MAGIC:
+            _, _version, _flags = _HEADER.unpack(_header)
+            if _version > STAT_VERSION:
+                raise ValueError(f'Unsupported stat version: {_version}.')
+            _remain = b''
+            for data in _iter_frames(fd, _flags, key):
+                _lines = (_remain + data).split(b'\n')
+                _remain = _lines.pop()
+                for line in _lines:
+                    if line: yield json.loads(line)
+            if _remain.strip():
+                yield json.loads(_remain)
+            return
+        ## the legacy format
+        _content = (_header + fd.read()).strip()
+    if not _content:
+        return
+    if key:
+        _content = _fernet(key).decrypt(_content)
+    yield from json.loads(_content)
@@ -35,6 +35,8 @@ class DomainCode(ErrorCode):
     DOMAIN_STOP_FAILED      = 0x10B0
     DOMAIN_NAME_INVALID     = 0x10C0
     DOMAIN_NESTED_DOMAIN    = 0x10D0
+    DOMAIN_PLUGIN_TIMEOUT   = 0x10E0
+    DOMAIN_ROLLBACK_FAILED  = 0x10F0
     pass
 
 class CapabilityCode(ErrorCode):
@@ -79,6 +81,8 @@ DOMAIN_CLOSE_FAILED             = 0x10A0
 DOMAIN_STOP_FAILED              = 0x10B0
 DOMAIN_NAME_INVALID             = 0x10C0
 DOMAIN_NESTED_DOMAIN            = 0x10D0
+DOMAIN_PLUGIN_TIMEOUT           = 0x10E0
+DOMAIN_ROLLBACK_FAILED          = 0x10F0
 # for capability use
 VCD_INTERNAL_ERROR              = 0x1100
 ARCHIVE_UNPACK_FAILED           = 0x1200
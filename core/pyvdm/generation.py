@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+from contextlib import contextmanager
+import fcntl
+import json
+import os
+from pathlib import Path
+import shutil
+import time
+
+from pyvdm.core.utils import (POSIX, STAT_POSTFIX, StatBuffer, file_digest)
+
+GENERATION_DIRECTORY = '.generations'
+CURRENT_LINK = '.current'
+LOCK_FILENAME = '.generations.lock'
+MANIFEST_FILENAME = 'MANIFEST.json'
+OBJECT_DIRECTORY = 'objects'
+
+def _fsync_directory(path):
+    _fd = os.open( POSIX(path), os.O_RDONLY|os.O_DIRECTORY )
+    try:
+        os.fsync(_fd)
+    finally:
+        os.close(_fd)
+    pass
+
+def _link_or_copy(source, target):
+    try:
+        os.link( POSIX(source), POSIX(target) )
+    except OSError:
+        shutil.copyfile( POSIX(source), POSIX(target) ) #across the file systems
+    pass
+
+class ObjectStore:
+    """Content-addressed stat blobs shared by all the domains.
+
+    The stat files in the generations are hard links to the blobs, so the
+    link count of a blob is its reference count: keeping an untouched file
+    or forking a domain only adds links, and a blob left with no other link
+    than its own is released.
+    """
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        pass
+
+    def path(self, digest:str) -> Path:
+        return self.root / digest[:2] / digest
+
+    @contextmanager
+    def locked(self):
+        ## shared by the core daemon and the command line
+        with open(POSIX(self.root / '.lock'), 'w') as fd:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+
+    def link(self, source, target, move=False) -> dict:
+        ## place `target` as a reference to the blob of `source`, a file or a `StatBuffer`
+        _buffer = isinstance(source, StatBuffer)
+        _digest = source.digest() if _buffer else file_digest(source)
+        _object = self.path(_digest)
+        with self.locked():
+            if not _object.exists():
+                _object.parent.mkdir(exist_ok=True)
+                _temp = _object.with_suffix('.tmp') #never expose a partial blob
+                if _buffer:
+                    source.dump(_temp)
+                else:
+                    (shutil.move if move else shutil.copyfile)( POSIX(source), POSIX(_temp) )
+                os.replace( POSIX(_temp), POSIX(_object) )
+            _link_or_copy(_object, target)
+        if _buffer:
+            source.close()
+        elif move:
+            Path(source).unlink(missing_ok=True)
+        return {'size':_object.stat().st_size, 'digest':_digest}
+
+    def release(self, digests):
+        ## drop the blobs no longer referenced by any domain
+        with self.locked():
+            for _digest in set(digests):
+                _object = self.path(_digest)
+                try:
+                    if _object.stat().st_nlink==1:
+                        _object.unlink()
+                except OSError:
+                    pass
+        pass
+
+    pass
+
+class GenerationStore:
+    """Transactional commit of the stat files of one domain.
+
+    Each save creates a new generation directory holding all the stat files
+    (the untouched ones hard-linked from the parent generation) and a
+    manifest, then flips the `.current` symlink to it with a single rename
+    and one directory fsync. The file data is not synced one by one: a
+    generation not matching its manifest after a crash is rolled back to
+    its parent, which is kept until the next commit. The stat files are
+    references into the `ObjectStore`, never copies. The commits of one
+    domain (with their collection), the rollbacks and the recovery are
+    serialized across the processes, e.g. the CLI and the daemon.
+    """
+    def __init__(self, root, objects:ObjectStore):
+        self.root = Path(root)
+        self.objects = objects
+        self.generations = self.root / GENERATION_DIRECTORY
+        self.link = self.root / CURRENT_LINK
+        pass
+
+    @contextmanager
+    def locked(self):
+        ## taken before the lock of the object store, never inside it
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(POSIX(self.root / LOCK_FILENAME), 'w') as fd:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+
+    @property
+    def directory(self) -> Path:
+        ## fallback to the flat layout before the first commit
+        return self.link if self.link.is_dir() else self.root
+
+    def current(self):
+        return self.link.resolve() if self.link.is_dir() else None
+
+    @staticmethod
+    def manifest(generation) -> dict:
+        try:
+            with open(POSIX(Path(generation) / MANIFEST_FILENAME), 'r') as fd:
+                return json.load(fd)
+        except:
+            return dict()
+
+    def verify(self, generation, deep=True) -> bool:
+        ## the digests are only checked `deep`, the sizes always
+        _manifest = self.manifest(generation)
+        if not _manifest:
+            return False
+        for _name,item in _manifest['files'].items():
+            _file = Path(generation) / _name
+            if not _file.is_file() or _file.stat().st_size!=item['size']:
+                return False
+            if deep and file_digest(_file)!=item['digest']:
+                return False
+        return True
+
+    def numbers(self) -> list:
+        if not self.generations.is_dir():
+            return []
+        return [ int(x.name) for x in self.generations.iterdir() if x.name.isdigit() ]
+
+    def interrupted(self) -> bool:
+        ## a leftover newer than the current generation, or a half-made link
+        current = self.current()
+        _latest = max(self.numbers(), default=0)
+        return (self.root / f'{CURRENT_LINK}.tmp').exists() or (current is not None and _latest > int(current.name))
+
+    def flip(self, generation):
+        _tmp = self.root / f'{CURRENT_LINK}.tmp'
+        _tmp.unlink(missing_ok=True)
+        os.symlink( POSIX(Path(generation).relative_to(self.root)), POSIX(_tmp) )
+        os.replace( POSIX(_tmp), POSIX(self.link) )
+        _fsync_directory(self.root) #the only fsync of the commit
+        pass
+
+    def _write_manifest(self, generation, parent, files:dict):
+        _manifest = {
+            'generation': int(generation.name),
+            'parent': parent,
+            'time': int(time.time()),
+            'files': files
+        }
+        with open(POSIX(generation / MANIFEST_FILENAME), 'w') as fd:
+            json.dump(_manifest, fd)
+        pass
+
+    def commit(self, staged:dict) -> Path:
+        """Commit `{stat_filename: StatBuffer}` along with the untouched stat files."""
+        with self.locked():
+            return self.__commit(staged)
+
+    def __commit(self, staged:dict) -> Path:
+        parent = self.current()
+        _parent_files = self.manifest(parent).get('files', {}) if parent else {}
+        ## never reuse a number, the leftovers are released by `collect`
+        _number = max(self.numbers(), default=0) + 1
+        generation = self.generations / f'{_number:08d}'
+        generation.mkdir(parents=True)
+        ##
+        files = dict()
+        for _file in self.directory.glob(f'*.{STAT_POSTFIX}'):
+            if _file.name in staged: continue
+            if _file.name in _parent_files:
+                _link_or_copy(_file, generation/_file.name)
+                files[_file.name] = _parent_files[_file.name]
+            else:
+                ## the flat stat files are moved in, the newly touched ones are referenced
+                files[_file.name] = self.objects.link(_file, generation/_file.name, move=not parent)
+        for _name,_buffer in staged.items():
+            files[_name] = self.objects.link(_buffer, generation/_name)
+        ##
+        self._write_manifest(generation, parent.name if parent else '', files)
+        self.flip(generation)
+        self.collect()
+        return generation
+
+    def fork(self, source:'GenerationStore') -> Path:
+        with self.locked(), source.locked():
+            return self.__fork(source)
+
+    def __fork(self, source:'GenerationStore') -> Path:
+        ## reference the blobs of the source generation, no stat file is copied
+        _current = source.current()
+        generation = self.generations / f'{1:08d}'
+        generation.mkdir(parents=True)
+        files = source.manifest(_current).get('files', {}) if _current else {}
+        for _name in files:
+            _link_or_copy(_current/_name, generation/_name)
+        self._write_manifest(generation, '', files)
+        self.flip(generation)
+        return generation
+
+    def rollback(self) -> bool:
+        with self.locked():
+            return self.__rollback()
+
+    def __rollback(self) -> bool:
+        current = self.current()
+        _parent = self.manifest(current).get('parent') if current else ''
+        if not _parent or not (self.generations / _parent).is_dir():
+            return False
+        self.flip(self.generations / _parent)
+        return True
+
+    def recover(self) -> bool:
+        ## roll back the generation torn by a crash, only re-hashed after an interrupted commit
+        with self.locked():
+            current = self.current()
+            if current and not self.verify(current, deep=self.interrupted()):
+                print( f'Stat generation "{current.name}" is corrupted, rolled back.' )
+                return self.__rollback()
+            return True
+
+    def digests(self, generations=None) -> list:
+        if generations is None:
+            generations = list(self.generations.iterdir()) if self.generations.is_dir() else []
+        result = list()
+        for _gen in generations:
+            _manifest = self.manifest(_gen)
+            if _manifest:
+                result.extend( x['digest'] for x in _manifest['files'].values() )
+            else:
+                ## a crashed commit without the manifest, hash its references
+                result.extend( file_digest(x) for x in Path(_gen).glob(f'*.{STAT_POSTFIX}') )
+        return result
+
+    def collect(self):
+        ## keep the current generation and its parent only
+        current = self.current()
+        _keep = { current.name, self.manifest(current).get('parent', '') }
+        _dropped = [ x for x in self.generations.iterdir() if x.name not in _keep ]
+        _digests = self.digests(_dropped)
+        for item in _dropped:
+            shutil.rmtree(item, ignore_errors=True)
+        self.objects.release(_digests)
+        pass
+
+    pass
@@ -1,19 +1,34 @@
 #!/usr/bin/env python3
 import argparse
-import concurrent.futures
+from contextlib import (contextmanager, nullcontext)
+import functools
 import json
 import os
 from pathlib import Path
+import sys
+import threading
 import traceback
 
-import pyvdm.core.PluginManager as P_MAN
-import pyvdm.core.DomainManager as D_MAN
-import pyvdm.core.CapabilityManager as C_MAN
-import pyvdm.core.ApplicationManager as A_MAN
-from pyvdm.core.utils import (POSIX, StatFile)
+import pyvdm.core.profiler as PROF
+from pyvdm.core.utils import (POSIX, STAT_EXCHANGE_BUFFER, StatFile, lazy_import)
 from pyvdm.core.errcode import (ErrorCode, DomainCode, PluginCode)
 from pyvdm.interface import SRC_API
 
+## the managers pull in dbus/psutil/requests, only import them on use
+P_MAN = lazy_import('pyvdm.core.PluginManager')
+D_MAN = lazy_import('pyvdm.core.DomainManager')
+C_MAN = lazy_import('pyvdm.core.CapabilityManager')
+A_MAN = lazy_import('pyvdm.core.ApplicationManager')
+BENCH = lazy_import('pyvdm.core.benchmark')
+## the runtime of the domain operations, never on the `pyvdm run` path
+SCHED = lazy_import('pyvdm.core.scheduler')
+AUTOSAVE = lazy_import('pyvdm.core.autosave')
+WORKER = lazy_import('pyvdm.core.worker')
+CODEC = lazy_import('pyvdm.core.codec')
+PROC = lazy_import('pyvdm.core.process')
+SERVICE = lazy_import('pyvdm.core.service')
+FUTURES = lazy_import('concurrent.futures')
+
 try:
     from .. import __version__ # type: ignore
 except:
@@ -23,10 +38,32 @@ VDM_HOME = Path('~/.vdm').expanduser()
 PLUGIN_DIRECTORY = VDM_HOME / 'plugins'
 DOMAIN_DIRECTORY = VDM_HOME / 'domains'
 CAPABILITY_DIRECTORY = VDM_HOME / 'capability'
+POOL_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+DEFAULT_DEADLINES = {'onStart':30, 'onResume':60, 'onSave':30, 'onClose':30, 'onStop':30} #in seconds
+
+def _exclusive(fn):
+    ## one domain operation at a time, whoever the caller is: the daemon, the tray or the autosave
+    @functools.wraps(fn)
+    def _wrapper(self, *args, **kwargs):
+        with self.lock:
+            return fn(self, *args, **kwargs)
+    return _wrapper
+
+def _stat_argument(plugin, stat:StatFile, load=True) -> tuple:
+    ## the buffer-based plugins get a file object, the others the path to the in-memory stat;
+    ## the buffer is leased to the call, and only closed by it once settled
+    if plugin.STAT_EXCHANGE==STAT_EXCHANGE_BUFFER:
+        _buffer = stat.lease(load)
+        return (_buffer.open(), _buffer)
+    _buffer = stat.lease()
+    return (_buffer.path, _buffer)
 
 class CoreMetaPlugin(SRC_API):
+    STAT_EXCHANGE = STAT_EXCHANGE_BUFFER
+
     def __init__(self):
         from pyvdm.interface import CapabilityLibrary
+        self.name = 'global'
         self.xm = CapabilityLibrary.CapabilityHandleLocal('x11-manager')
 
     def onStart(self): return 0
@@ -37,14 +74,12 @@ class CoreMetaPlugin(SRC_API):
         record = {
             'current_desktop': self.xm.get_current_desktop()
         }
-        with open(stat_file, 'w') as f:
-            json.dump(record, f)
+        stat_file.write( json.dumps(record).encode() )
         return 0
 
     def onResume(self, stat_file, new=False):
         ## load stat file with failure check
-        with open(stat_file, 'r') as f:
-            _file = f.read().strip()
+        _file = stat_file.read().strip()
         if len(_file)==0:
             return 0
         else:
@@ -59,20 +94,57 @@ class CoreMetaPlugin(SRC_API):
     pass
 
 class CoreManager:
-    def __init__(self):
-        self.root = DOMAIN_DIRECTORY
+    def __init__(self, root=''):
+        self.home = Path(root).resolve() if root else VDM_HOME
+        self.root = self.home / DOMAIN_DIRECTORY.name
         self.root.mkdir(exist_ok=True, parents=True)
+        self.plugins, self.hints = dict(), dict()
+        self.app_plugins = set()
+        self.concurrency = None
+        self.deadlines = dict(DEFAULT_DEADLINES)
+        self.stragglers = list()
+        ## persistent runtime: worker pool and plugin instances
+        self.pool = None
+        self.plugin_cache = dict()
+        self.global_plugin = None
+        self.timing = PROF.TimingStore( POSIX(self.home) )
+        self.lock = threading.RLock() #one domain operation at a time
+        self.autosaver = None
         #
-        self.cm = C_MAN.CapabilityManager( POSIX(CAPABILITY_DIRECTORY) )
-        self.pm = P_MAN.PluginManager( POSIX(PLUGIN_DIRECTORY), self.cm )
-        self.am = A_MAN.ApplicationManager( POSIX(VDM_HOME), self.pm )
-        self.dm = D_MAN.DomainManager( POSIX(DOMAIN_DIRECTORY), self.am )
+        self.cm = C_MAN.CapabilityManager( POSIX(self.home / CAPABILITY_DIRECTORY.name) )
+        self.pm = P_MAN.PluginManager( POSIX(self.home / PLUGIN_DIRECTORY.name), self.cm )
+        self.pm.listeners.append( self.invalidate )
+        self.am = A_MAN.ApplicationManager( POSIX(self.home), self.pm )
+        self.dm = D_MAN.DomainManager( POSIX(self.root), self.am )
         #
+        self.save_report = dict()
+        self.save_counts = dict()
         _domain = self.dm.open_domain_name
         if _domain:
             self.open_domain(_domain)
         pass
 
+    def getPlugin(self, key:tuple, factory):
+        if key not in self.plugin_cache:
+            ## drop the instances of the replaced install
+            for _key in [ k for k in self.plugin_cache if k[:2]==key[:2] ]:
+                self.plugin_cache.pop(_key)
+            _plugin = factory()
+            if isinstance(_plugin, PluginCode) or not _plugin:
+                return _plugin
+            self.plugin_cache[key] = _plugin
+        return self.plugin_cache[key]
+
+    def invalidate(self, name=None):
+        ## drop the cached instances of the upgraded (or removed) plugin
+        if name is None:
+            self.plugin_cache.clear()
+        else:
+            _match = lambda x: isinstance(x, str) and (x==name or x.startswith(f'{name}-'))
+            for key in [ k for k in self.plugin_cache if any(_match(x) for x in k) ]:
+                self.plugin_cache.pop(key)
+        pass
+
     def load(self, name):
         ## load config
         _config = self.dm.getDomainConfig(name)
@@ -82,70 +154,206 @@ class CoreManager:
         if hasattr(self, 'plugins'):
             del self.plugins #cleanup
         self.plugins = dict()
+        self.hints = dict()
+        self.app_plugins = set()
+        _stat_root = self.dm.stat_directory(name)
+        _schedule = _config.get('schedule', {})
+        self.concurrency = _config.get('concurrency', None)
+        self.deadlines = { **DEFAULT_DEADLINES, **_config.get('deadlines', {}) }
+        _compress = bool( _config.get('compress_stats', False) ) #opt in the compact stat encoding
 
         ## load GUI APP plugins
+        if not self.am.applications: self.am.refresh()
         for _name in _config['applications']:
-            _plugin = self.am.instantiate_plugin(_name)
+            _compat = self.am.applications.get(_name, {}).get('compatible')
+            if _compat not in (None, A_MAN.CHECKED_SYMBOL, A_MAN.HINT_GENERATED):
+                _compat = self.pm.resolvePlugin(_compat)
+            _plugin = self.getPlugin( (_name, _compat, self.pm.installedStamp(_compat) if _compat else (), _compress),
+                        lambda: self.am.instantiate_plugin(_name, _compress) )
             if isinstance(_plugin, PluginCode):
                 return _plugin #return plugin error code
-            _stat = StatFile(DOMAIN_DIRECTORY/name, _name)
+            if not _plugin:
+                continue #incompatible application
+            _stat = StatFile(_stat_root, _name)
             self.plugins.update( {_plugin: _stat} )
+            self.app_plugins.add( _plugin.name )
+            self.hints[_plugin.name] = self.getHint(_plugin, 'normal', _schedule)
             pass
         ## load other plugins
         for _name,_ver in _config['plugins'].items():
-            _plugin = self.pm.getInstalledPlugin(_name, _ver)
+            _resolved = self.pm.resolvePlugin(_name, _ver)
+            ## the installs by the command line are only seen through the stamp
+            _plugin = self.getPlugin( (_name, _resolved, self.pm.installedStamp(_resolved)),
+                        lambda: self.pm.getInstalledPlugin(_name, _ver) )
             if isinstance(_plugin, PluginCode):
                 return _plugin #return plugin error code
-            _stat   = StatFile(DOMAIN_DIRECTORY/name, _name)
+            _stat   = StatFile(_stat_root, _name)
             self.plugins.update( {_plugin: _stat} )
+            self.hints[_plugin.name] = self.getHint(_plugin, 'high', _schedule)
         ## load global CoreMetaPlugin
-        global_plugin = CoreMetaPlugin()
-        global_stat   = StatFile(DOMAIN_DIRECTORY/name, 'global')
-        self.plugins.update({ global_plugin : global_stat })
+        if not self.global_plugin:
+            self.global_plugin = CoreMetaPlugin()
+        global_stat = StatFile(_stat_root, 'global')
+        self.plugins.update({ self.global_plugin : global_stat })
+        self.hints[self.global_plugin.name] = self.getHint(self.global_plugin, 'core', _schedule, before=['*'])
 
         return PluginCode.ALL_CLEAN
 
+    @staticmethod
+    def getHint(plugin, priority:str, schedule:dict, before=[]) -> dict:
+        _config = getattr(plugin, 'config', {})
+        hint = {
+            'after':    list( _config.get('after', []) ),
+            'before':   list( _config.get('before', before) ),
+            'priority': _config.get('priority', priority)
+        }
+        if 'deadline' in _config:
+            hint['deadline'] = _config['deadline']
+        ## domain-specific hints take precedence over the plugin's own
+        hint.update( schedule.get(plugin.name, {}) )
+        return hint
+
+    def snapshot(self) -> dict:
+        return {
+            'plugins': self.plugins, 'hints': self.hints,
+            'deadlines': self.deadlines, 'concurrency': self.concurrency
+        }
+
+    @staticmethod
+    def getDeadline(name, phases:tuple, snapshot:dict):
+        _deadline = snapshot['hints'].get(name, {}).get('deadline', {})
+        if not isinstance(_deadline, dict):
+            return _deadline #for the whole blade
+        ##
+        total = 0
+        for phase in phases:
+            _value = _deadline.get(phase, snapshot['deadlines'].get(phase))
+            if _value is None: return None
+            total += _value
+        return total
+
     #---------- online domain operations -----------#
-    def executeBlade(self, executor, worker):
-        _futures = [ executor.submit(worker, _plugin, _stat) 
-                    for _plugin,_stat in self.plugins.items() ]
+    @contextmanager
+    def executor(self):
+        if not self.pool:
+            self.pool = FUTURES.ThreadPoolExecutor(POOL_MAX_WORKERS, 'vdm-blade')
+        try:
+            yield self.pool
+        finally:
+            ## retire the pool occupied by the abandoned stragglers
+            if self.stragglers:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+        pass
+
+    def shutdown(self):
+        self.autosave(False)
+        self.dm.discard_standby()
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        self.invalidate()
+        self.pm.shutdown()
+        self.am.unwatch()
+        A_MAN.GLOBAL_INTERFACES.close()
+        CODEC.GLOBAL_OFFLOAD.shutdown()
+        self.global_plugin = None
+        pass
+
+    def executeBlade(self, executor, worker, phases:tuple, reverse=False, abandoned=None, snapshot=None, tracker=None):
+        snapshot = snapshot if snapshot else self.snapshot()
+        ## one process scan of the domain for the whole blade
+        worker = PROC.GLOBAL_PROCESSES.bind(worker, PROC.ProcessPhase(tracker if tracker else self.dm.tracker()))
+        abandoned = set() if abandoned is None else abandoned
+        _tasks = { _plugin.name:(_plugin,_stat) for _plugin,_stat in snapshot['plugins'].items() }
+        _deadlines = { _name:self.getDeadline(_name, phases, snapshot) for _name in _tasks }
+        scheduler = SCHED.BladeScheduler(snapshot['hints'], snapshot['concurrency'], _deadlines)
         ##
-        results = list()
-        for task in _futures:
-            try:
-                ret = task.result()
-                if ret is not None:
-                    results.append(ret)
-            except Exception as e:
-                print( traceback.format_exc() )
+        results = scheduler.run(executor, worker, _tasks, reverse, abandoned)
+        self.stragglers = scheduler.stragglers
+        if self.stragglers:
+            print( 'Stragglers abandoned in %s: %s'%('/'.join(phases), ', '.join(self.stragglers)) )
+            for _name,(_plugin,_) in _tasks.items():
+                if _name in self.stragglers and isinstance(getattr(_plugin, 'obj', None), WORKER.IsolatedPlugin):
+                    _plugin.obj.worker.kill() #reclaim the worker held by the straggler
         results = None if len(results)==0 else results
         return results
 
-    def save_domain(self, delayed=False) -> tuple:
-        if not self.dm.open_domain_name:
+    @_exclusive
+    def save_domain(self, delayed=False, incremental=False, names=None) -> tuple:
+        _open_name = self.dm.open_domain_name
+        if not _open_name:
             return (DomainCode.DOMAIN_NOT_OPEN, '')
+        ## only save the given plugins
+        snapshot = self.snapshot()
+        if names is not None:
+            snapshot['plugins'] = { k:v for k,v in snapshot['plugins'].items() if k.name in names }
         # save to current open domain
+        report, abandoned = dict(), set()
+        staged, staged_lock, committed = dict(), threading.Lock(), list()
         try:
-            with concurrent.futures.ThreadPoolExecutor() as executor:
+            with self.executor() as executor:
                 def _worker(plugin, stat):
-                    if plugin.onSave( stat.getFile() ) < 0:
+                    ## skip the plugin which reports no change
+                    if incremental and plugin.onChanged()==0:
+                        report[plugin.name] = 'skipped'
+                        return None
+                    _argument, _buffer = _stat_argument(plugin, stat, load=False)
+                    try:
+                        with self.timing.measure(plugin.name, 'onSave'):
+                            ret = plugin.onSave(_argument)
+                    except:
+                        _buffer.close()
+                        raise
+                    if ret < 0:
+                        _buffer.close()
                         return (DomainCode.DOMAIN_SAVE_FAILED, plugin.name)
-                    else:
-                        if not delayed: stat.putFile()
+                    if delayed:
+                        stat.hold(_buffer)
+                        report[plugin.name] = 'delayed'
                         return None
+                    _staged = stat.stage(incremental, _buffer)
+                    with staged_lock:
+                        if committed or plugin.name in abandoned:
+                            if _staged: _staged.close()
+                            return None #never commit the late output
+                        if _staged:
+                            staged[stat.stat_file.name] = _staged
+                    report[plugin.name] = 'committed' if _staged else 'skipped'
+                    return None
                 #
-                results = self.executeBlade(executor, _worker)
+                results = self.executeBlade(executor, _worker, ('onSave',), abandoned=abandoned, snapshot=snapshot)
+                ## commit all the staged outputs in one transaction
+                with staged_lock:
+                    committed.append(True)
+                with self.timing.measure(PROF.NAMESPACE_KEY, 'commit_stats'):
+                    self.dm.commit_stats(_open_name, staged)
                 if results: raise Exception( str(results) )
+                if abandoned:
+                    return (DomainCode.DOMAIN_PLUGIN_TIMEOUT, ', '.join(abandoned))
                 return (DomainCode.ALL_CLEAN, '')
         except:
             return (DomainCode.DOMAIN_SAVE_FAILED, traceback.format_exc())
+        finally:
+            self.timing.flush()
+            for _name in abandoned:
+                report[_name] = 'straggled'
+            self.save_report = report
+            for _name,_status in report.items():
+                _counts = self.save_counts.setdefault(_name, {'committed':0, 'skipped':0})
+                if _status in _counts: _counts[_status] += 1
+        pass
 
-    def open_domain(self, name) -> tuple:
+    @_exclusive
+    def open_domain(self, name, prepared=None, gates={}) -> tuple:
         ## prepare domain
-        ret_code = self.dm.initialize_domain(name)
-        if ret_code is not DomainCode.ALL_CLEAN:
-            return (DomainCode.DOMAIN_START_FAILED, hex(ret_code.value))
+        if not prepared:
+            with self.timing.measure(PROF.NAMESPACE_KEY, 'initialize_domain'):
+                ret_code = self.dm.initialize_domain(name)
+            if ret_code is not DomainCode.ALL_CLEAN:
+                return (DomainCode.DOMAIN_START_FAILED, hex(ret_code.value))
         ## open domain procedure
+        abandoned = set()
         try:
             ret_code = DomainCode.ALL_CLEAN
             ## load domain-specific plugins
@@ -154,75 +362,228 @@ class CoreManager:
                 ret_code = DomainCode.DOMAIN_LOAD_FAILED
                 raise Exception( str(ret) )
             ## onStart --> onResume
-            with concurrent.futures.ThreadPoolExecutor() as executor:
+            with self.executor() as executor:
                 ## internal worker
                 def _worker(plugin, stat):
-                    if plugin.onStart() < 0:
+                    ## wait for the resources released by the previous domain
+                    if plugin.name in gates:
+                        gates[plugin.name].wait()
+                    with self.timing.measure(plugin.name, 'onStart'):
+                        ret = plugin.onStart()
+                    if ret < 0:
                         return (DomainCode.DOMAIN_START_FAILED, plugin.name)
-                    if plugin.onResume( stat.getFile() ) < 0:
+                    _argument, _buffer = _stat_argument(plugin, stat)
+                    try:
+                        with self.timing.measure(plugin.name, 'onResume'):
+                            ret = plugin.onResume(_argument)
+                    finally:
+                        _buffer.close()
+                    if ret < 0:
                         return (DomainCode.DOMAIN_RESUME_FAILED, plugin.name)
                     return None
                 ##
-                results = self.executeBlade(executor, _worker)
+                _tracker = self.dm.tracker(prepared) if prepared else None
+                results = self.executeBlade(executor, _worker, ('onStart','onResume'), abandoned=abandoned, tracker=_tracker)
                 if results:
                     ret_code = results[0][0]
                     raise Exception( str(results) )
         except:
-            self.dm.finalize_domain()
+            if not prepared:
+                self.dm.finalize_domain()
+            else:
+                self.dm.discard_domain(prepared)
             return (ret_code, traceback.format_exc())
         else:
+            if abandoned:
+                return (DomainCode.DOMAIN_PLUGIN_TIMEOUT, ', '.join(abandoned))
             return (DomainCode.ALL_CLEAN, '')
+        finally:
+            self.timing.flush()
         pass
 
-    def close_domain(self):
+    @_exclusive
+    def close_domain(self, snapshot=None, gates={}, executor=None, finalize=True):
         if not self.dm.open_domain_name:
             return (DomainCode.DOMAIN_NOT_OPEN, '')
         # onClose --> onStop
+        abandoned = set()
         try:
-            with concurrent.futures.ThreadPoolExecutor() as executor:
+            with self.executor() if not executor else nullcontext(executor) as executor:
                 def _worker(plugin, stat):
-                    if plugin.onClose() < 0:
-                        return (DomainCode.DOMAIN_CLOSE_FAILED, plugin.name)
-                    if plugin.onStop() < 0:
-                        return (DomainCode.DOMAIN_STOP_FAILED, plugin.name)
+                    try:
+                        with self.timing.measure(plugin.name, 'onClose'):
+                            ret = plugin.onClose()
+                        if ret < 0:
+                            return (DomainCode.DOMAIN_CLOSE_FAILED, plugin.name)
+                        with self.timing.measure(plugin.name, 'onStop'):
+                            ret = plugin.onStop()
+                        if ret < 0:
+                            return (DomainCode.DOMAIN_STOP_FAILED, plugin.name)
+                    finally:
+                        if plugin.name in gates: gates[plugin.name].set()
                 #
-                results = self.executeBlade(executor, _worker)
-                self.dm.finalize_domain()
+                results = self.executeBlade(executor, _worker, ('onClose','onStop'),
+                                            reverse=True, abandoned=abandoned, snapshot=snapshot)
+                if finalize: self.dm.finalize_domain()
                 if results: raise Exception( str(results) )
+                if abandoned:
+                    return (DomainCode.DOMAIN_PLUGIN_TIMEOUT, ', '.join(abandoned))
                 return (DomainCode.ALL_CLEAN, '')
         except:
             return (DomainCode.DOMAIN_CLOSE_FAILED, traceback.format_exc())
+        finally:
+            ## release the gates held by the stragglers
+            for _gate in gates.values(): _gate.set()
+            self.timing.flush()
         pass
 
-    def switch_domain(self, name):
-        if not self.dm.open_domain_name:
+    @_exclusive
+    def pipeline_switch(self, old_name, name) -> tuple:
+        _passed = lambda ret: ret[0] in (DomainCode.ALL_CLEAN, DomainCode.DOMAIN_PLUGIN_TIMEOUT)
+        stage = FUTURES.ThreadPoolExecutor(2, 'vdm-switch')
+        teardown = FUTURES.ThreadPoolExecutor(POOL_MAX_WORKERS, 'vdm-teardown')
+        try:
+            ## prepare the new namespace along with the old domain teardown
+            def _prepare():
+                with self.timing.measure(PROF.NAMESPACE_KEY, 'initialize_domain'):
+                    return self.dm.acquire_domain(name)
+            _prepared = stage.submit(_prepare)
+            ret = self.save_domain()
+            if not _passed(ret):
+                self.dm.discard_domain( _prepared.result()[1] )
+                return ret
+            ## close the old plugins, each application gates its successor in the new domain;
+            ## the global plugin closes last, so it never gates the new domain
+            snapshot = self.snapshot()
+            gates = { _plugin.name:threading.Event() for _plugin in snapshot['plugins'] if _plugin.name in self.app_plugins }
+            ## the old record is finalized by itself, the new one is committed meanwhile
+            _old = self.dm.stat.getStat()
+            def _teardown():
+                ## the lock is held by this thread, the teardown runs in the stage
+                ret = CoreManager.close_domain.__wrapped__(self, snapshot, gates, teardown, finalize=False)
+                if _passed(ret):
+                    self.dm.finalize_domain(_old)
+                return ret
+            _closed = stage.submit(_teardown)
+            def _rollback(finalized:bool):
+                ## resume the old applications from the last generation, in the surviving namespace if any
+                if finalized:
+                    return self.open_domain(old_name)
+                self.dm.commit_domain(_old, history=False)
+                return self.open_domain(old_name, _old)
+            ## open the new domain once its namespace is ready
+            (ret_code, prepared) = _prepared.result()
+            if ret_code is not DomainCode.ALL_CLEAN:
+                _rollback( _passed(_closed.result()) )
+                return (DomainCode.DOMAIN_START_FAILED, hex(ret_code.value))
+            ## record the new domain before its applications start, e.g. for their `pyvdm run`
+            self.dm.commit_domain(prepared)
+            ret_open = self.open_domain(name, prepared, gates)
+            ret_close = _closed.result()
+            if not _passed(ret_close):
+                ## the old namespace is kept, never leave the new domain over it
+                if _passed(ret_open):
+                    self.close_domain(finalize=False)
+                    self.dm.discard_domain(prepared)
+                _rollback(False)
+                return ret_close
+            if not _passed(ret_open):
+                _rollback(True) #the new namespace is discarded
+            return ret_open
+        finally:
+            stage.shutdown(wait=False)
+            teardown.shutdown(wait=False, cancel_futures=True)
+        pass
+
+    def discard_standby(self):
+        self.dm.discard_standby()
+        pass
+
+    def autosave(self, enabled=True, **policy):
+        if self.autosaver:
+            self.autosaver.stop()
+            self.autosaver = None
+        if enabled:
+            self.autosaver = AUTOSAVE.AutosaveEngine(self, **policy).start()
+        pass
+
+    def prewarm_domain(self, name=None, mode='frequency'):
+        ## pre-warm the given domain, or the most likely next one
+        name = name if name else self.dm.predict_next(self.dm.open_domain_name, mode)
+        if not name:
+            return (DomainCode.DOMAIN_NOT_EXIST, '')
+        with self.timing.measure(PROF.NAMESPACE_KEY, 'prewarm_domain'):
+            ret_code = self.dm.prewarm_domain(name)
+        return (ret_code, name)
+
+    @_exclusive
+    def switch_domain(self, name, pipelined=True):
+        ## the stragglers are abandoned, not fatal for a switch
+        _passed = lambda ret: ret[0] in (DomainCode.ALL_CLEAN, DomainCode.DOMAIN_PLUGIN_TIMEOUT)
+        _open_name = self.dm.open_domain_name
+        if not _open_name:
             ret = self.open_domain(name)
-            if ret is not True: return ret
+            if not _passed(ret): return ret
+        elif pipelined and self.dm.is_independent(_open_name, name):
+            ret = self.pipeline_switch(_open_name, name)
+            if not _passed(ret): return ret
         else:
             #TODO: restore, if re-open the same domain and the stat files changed
             ret = self.save_domain()
-            if ret is not True: return ret
+            if not _passed(ret): return ret
             #
             ret = self.close_domain()
-            if ret is not True: return ret
+            if not _passed(ret): return ret
             #
             ret = self.open_domain(name)
-            if ret is not True: return ret
+            if not _passed(ret): return ret
         return True
 
     pass
 
+class RemoteCoreManager:
+    def __init__(self):
+        self.client = SERVICE.ControlClient( POSIX(VDM_HOME) )
+        self.root = DOMAIN_DIRECTORY
+        ## offline managers, the online domain operations go to the daemon
+        self.cm = C_MAN.CapabilityManager( POSIX(CAPABILITY_DIRECTORY) )
+        self.pm = P_MAN.PluginManager( POSIX(PLUGIN_DIRECTORY), self.cm )
+        self.am = A_MAN.ApplicationManager( POSIX(VDM_HOME), self.pm )
+        self.dm = D_MAN.DomainManager( POSIX(DOMAIN_DIRECTORY), self.am )
+        pass
+
+    def __getattr__(self, name):
+        ## the online domain operations go to the daemon
+        if name=='client':
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def shutdown(self):
+        pass
+
+    pass
+
+def serve():
+    cm = CoreManager()
+    server = SERVICE.ControlServer( cm, POSIX(VDM_HOME) )
+    print( f'Control daemon listening on "{server.address}".' )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        cm.shutdown()
+    pass
+
 def execute(command, args):
     if command=='run':
         _stat = StatFile(VDM_HOME).getStat()
         if _stat['name']:
-            uid, gid = os.getuid(), os.getgid()
-            target_pid = str(_stat['pid'])
-            execute_command_line = ' '.join(args.execute_command_line)
-            os.execl('/usr/bin/nsenter',
-                     '/usr/bin/nsenter', '--preserve-credentials', '-U','-m','-C','-p', '-t', target_pid, '--',
-                     '/usr/bin/unshare', f'--map-group={uid}', f'--map-user={gid}', '--',
-                     *args.execute_command_line)
+            tracker = PROC.DomainTracker(_stat['pid'], _stat.get('cgroup', ''))
+            tracker.attach() #the forked application is then tracked with the domain
+            _command = tracker.command(args.execute_command_line)
+            os.execl( _command[0], *_command )
         else:
             os.execl( args.execute_command_line[0], *args.execute_command_line )
         pass
@@ -239,22 +600,52 @@ def execute(command, args):
         cm = C_MAN.CapabilityManager( POSIX(CAPABILITY_DIRECTORY) )
         return C_MAN.execute(cm, args.capability_command, args)
 
+    if command in ['stats']:
+        store = PROF.TimingStore( POSIX(VDM_HOME) )
+        return PROF.execute(store, args.stats_command, args)
+
     if command in ['application', 'am']:
         am = A_MAN.ApplicationManager( POSIX(VDM_HOME) )
         return A_MAN.execute(am, args.application_command, args)
 
-    cm = CoreManager()
+    if command=='serve':
+        return serve()
+
+    if command in ['benchmark']:
+        return BENCH.execute(args.benchmark_command, args)
+
+    ## forward to the control daemon if available
+    client = SERVICE.ControlClient( POSIX(VDM_HOME) )
+    cm = client if client.available() else CoreManager()
     if args.save_flag:
-        return cm.save_domain()
+        return cm.save_domain(incremental=args.incremental_flag)
     elif args.close_flag:
         return cm.close_domain()
     elif args.domain_name:
         return cm.switch_domain(args.domain_name)
     else:
         print('<Current Domain Status>')
+        if isinstance(cm, SERVICE.ControlClient):
+            print( json.dumps(cm.status(), indent=4) )
     return
 
+def _peek_command(argv:list):
+    _argv = list(argv)
+    while _argv:
+        x = _argv.pop(0)
+        if x=='--open':
+            _argv = _argv[1:]
+        elif not x.startswith('-'):
+            return x, _argv
+    return None, []
+
 def main():
+    command, remainder = _peek_command( sys.argv[1:] )
+    ## fast path: `run` is on the hot path of every app launch
+    if command=='run':
+        args = argparse.Namespace(execute_command_line=remainder)
+        return execute(command, args)
+
     parser = argparse.ArgumentParser(
         description = 'The VDM Core.'
     )
@@ -263,6 +654,8 @@ def main():
         help='open an existing domain')
     parser.add_argument('--save', dest='save_flag', action='store_true',
         help='save the current open domain')
+    parser.add_argument('--incremental', dest='incremental_flag', action='store_true',
+        help='only commit the changed stat files when save')
     parser.add_argument('--close', dest='close_flag', action='store_true',
         help='close the current open domain')
     subparsers = parser.add_subparsers(dest='command')
@@ -272,29 +665,51 @@ def main():
     run_parser.add_argument('execute_command_line', nargs=argparse.REMAINDER,
         help='execute command line')
 
+    # control daemon
+    serve_parser = subparsers.add_parser('serve',
+        help='Run the control daemon owning the domain operations.')
+
+    ## only the selected sub-command imports its manager
     # domain_manager
     dm_parser = subparsers.add_parser('domain', aliases=['dm'],
         help='Call VDM Domain Manager.')
     dm_subparsers = dm_parser.add_subparsers(dest='domain_command')
-    D_MAN.init_subparsers(dm_subparsers)
+    if command in ['domain', 'dm']:
+        D_MAN.init_subparsers(dm_subparsers)
 
     # plugin_manager
     pm_parser = subparsers.add_parser('plugin', aliases=['pm'],
         help='Call VDM Plugin Manager.')
     pm_subparsers = pm_parser.add_subparsers(dest='plugin_command')
-    P_MAN.init_subparsers(pm_subparsers)
+    if command in ['plugin', 'pm']:
+        P_MAN.init_subparsers(pm_subparsers)
 
     # capability_manager
     cm_parser = subparsers.add_parser('capability', aliases=['cm'],
         help='Call VDM Capability Manager.')
     cm_subparsers = cm_parser.add_subparsers(dest='capability_command')
-    C_MAN.init_subparsers(cm_subparsers)
+    if command in ['capability', 'cm']:
+        C_MAN.init_subparsers(cm_subparsers)
 
     # application_manager
     am_parser = subparsers.add_parser('application', aliases=['am'],
         help='Call VDM Application Manager.')
     am_subparsers = am_parser.add_subparsers(dest='application_command')
-    A_MAN.init_subparsers(am_subparsers)
+    if command in ['application', 'am']:
+        A_MAN.init_subparsers(am_subparsers)
+
+    # lifecycle profiler
+    stats_parser = subparsers.add_parser('stats',
+        help='Show lifecycle timing statistics.')
+    stats_subparsers = stats_parser.add_subparsers(dest='stats_command')
+    PROF.init_subparsers(stats_subparsers)
+
+    # benchmark
+    bench_parser = subparsers.add_parser('benchmark',
+        help='Run the performance benchmarks.')
+    bench_subparsers = bench_parser.add_subparsers(dest='benchmark_command')
+    if command in ['benchmark']:
+        BENCH.init_subparsers(bench_subparsers)
 
     # sync_manager
     #TODO: add sync_manager    
@@ -303,6 +718,8 @@ def main():
     ret = execute(args.command, args)
     if isinstance(ret, ErrorCode):
         print( '%s: %s'%(type(ret).__name__, ret.name) )
+    elif args.command=='benchmark' and ret==False:
+        exit(1) #regression detected
     pass
 
 if __name__ == '__main__':
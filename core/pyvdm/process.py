@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+import os
+from pathlib import Path
+import signal
+import threading
+import time
+
+from pyvdm.core.utils import (POSIX, lazy_import)
+
+psutil = lazy_import('psutil')
+
+PROCESS_ATTRS = ['name', 'pid', 'cmdline']
+
+def cgroup2_root():
+    ## the cgroup v2 mount, also under the hybrid hierarchy
+    try:
+        with open('/proc/self/mounts', 'r') as fd:
+            for line in fd:
+                _fields = line.split()
+                if _fields[2]=='cgroup2': return Path(_fields[1])
+    except OSError:
+        pass
+    return None
+
+def namespace_of(pid):
+    ## the PID namespace identity, e.g. "pid:[4026531836]"
+    try:
+        return os.readlink(f'/proc/{pid}/ns/pid')
+    except OSError:
+        return None
+
+def process_info(pid) -> dict:
+    ## the `psutil` info dict of `PROCESS_ATTRS` from procfs, empty if exited
+    try:
+        with open(f'/proc/{pid}/comm', 'r') as fd:
+            _name = fd.read().strip()
+        with open(f'/proc/{pid}/cmdline', 'rb') as fd:
+            _cmdline = [ x.decode(errors='ignore') for x in fd.read().split(b'\0')[:-1] ]
+    except OSError:
+        return dict()
+    ## the comm is truncated to 15 characters
+    if _cmdline and len(_name)>=15 and Path(_cmdline[0]).name.startswith(_name):
+        _name = Path(_cmdline[0]).name
+    return { 'name':_name, 'pid':int(pid), 'cmdline':_cmdline }
+
+class DomainTracker:
+    """The processes of one domain, never those outside of it.
+
+    `pid` is the init process of the domain PID namespace, as seen from the
+    host. The members are read from the cgroup v2 subtree of the domain when
+    there is one, in O(domain processes); otherwise /proc is filtered by the
+    namespace identity, with one `readlink` and no `psutil` per process.
+    """
+    def __init__(self, pid, cgroup=''):
+        self.pid = int(pid)
+        self.cgroup = Path(cgroup) if cgroup else None
+        pass
+
+    @staticmethod
+    def create_cgroup(name:str, pids:list) -> str:
+        ## best effort, empty when the cgroup v2 is not delegated to the user
+        _root, _cgroup = cgroup2_root(), None
+        if not _root:
+            return ''
+        try:
+            with open('/proc/self/cgroup', 'r') as fd:
+                _own = [ x.strip()[3:] for x in fd if x.startswith('0::') ][0]
+            ## the nested domains, e.g. "A/B", are one flat cgroup
+            _name = name.strip('/').replace('/', '-')
+            _cgroup = _root / _own.lstrip('/') / f'vdm-{_name}-{pids[0]}'
+            _cgroup.mkdir()
+            for pid in pids:
+                (_cgroup / 'cgroup.procs').write_text( str(pid) )
+            return POSIX(_cgroup)
+        except (OSError, IndexError):
+            if _cgroup:
+                try: _cgroup.rmdir()
+                except OSError: pass
+            return ''
+
+    def pids(self) -> list:
+        if self.cgroup:
+            try:
+                return [ int(x) for x in (self.cgroup / 'cgroup.procs').read_text().split() ]
+            except OSError:
+                pass #the cgroup is gone, fallback to the namespace
+        _ns = namespace_of(self.pid)
+        if not _ns:
+            return []
+        return [ int(x) for x in os.listdir('/proc') if x.isdigit() and namespace_of(x)==_ns ]
+
+    def processes(self) -> list:
+        ## the same info dicts as `psutil` with `PROCESS_ATTRS`
+        return [ x for x in map(process_info, self.pids()) if x ]
+
+    def attach(self, pid=0) -> bool:
+        ## move `pid` into the domain cgroup, 0 for the caller itself
+        if not self.cgroup:
+            return False
+        try:
+            (self.cgroup / 'cgroup.procs').write_text( str(pid) )
+            return True
+        except OSError:
+            return False
+
+    def command(self, argv:list) -> list:
+        ## enter the domain namespaces
+        uid, gid = os.getuid(), os.getgid()
+        return ['/usr/bin/nsenter', '--preserve-credentials', '-U','-m','-C','-p', '-t', str(self.pid), '--',
+                '/usr/bin/unshare', f'--map-group={uid}', f'--map-user={gid}', '--', *argv]
+
+    def destroy(self):
+        ## kill the leftovers and remove the cgroup, after the namespace is killed
+        if not self.cgroup:
+            return
+        try:
+            (self.cgroup / 'cgroup.kill').write_text('1')
+        except OSError:
+            pass
+        for _ in range(100):
+            try:
+                self.cgroup.rmdir()
+                break
+            except FileNotFoundError:
+                break
+            except OSError:
+                time.sleep(0.01) #the members are still exiting
+        pass
+
+    pass
+
+class ProcessSnapshot:
+    """One scan of the process table, indexed for the plugin queries.
+
+    The entries are the `psutil` info dicts of `PROCESS_ATTRS`, in the scan
+    order; only the domain processes with a `tracker`. The namespace index
+    costs one `readlink` per process, so it is only built on the first
+    `namespace` query.
+    """
+    def __init__(self, tracker:DomainTracker=None):
+        self.processes = list()
+        self.names = dict() #name -> [info]
+        if tracker:
+            _infos = tracker.processes()
+        else:
+            _infos = [ proc.info for proc in psutil.process_iter(PROCESS_ATTRS) ]
+        for info in _infos:
+            self.processes.append( info )
+            self.names.setdefault( info['name'], [] ).append( info )
+        self.lock = threading.Lock()
+        self.namespaces = None #namespace -> [info]
+        pass
+
+    def by_name(self, name:str) -> list:
+        return self.names.get(name, [])
+
+    def namespace(self, pid) -> list:
+        ## the processes sharing the PID namespace of `pid`
+        with self.lock:
+            if self.namespaces is None:
+                self.namespaces = dict()
+                for info in self.processes:
+                    self.namespaces.setdefault( namespace_of(info['pid']), [] ).append( info )
+        _ns = namespace_of(pid)
+        return self.namespaces.get(_ns, []) if _ns else []
+
+    pass
+
+class ProcessPhase:
+    ## the snapshot of one lifecycle phase, captured on the first query
+    def __init__(self, tracker:DomainTracker=None):
+        self.tracker = tracker
+        self.lock = threading.Lock()
+        self.captured = None
+        pass
+
+    def snapshot(self) -> ProcessSnapshot:
+        with self.lock:
+            if self.captured is None:
+                self.captured = ProcessSnapshot(self.tracker)
+            return self.captured
+
+    pass
+
+class ProcessTable:
+    """The process snapshot shared within one lifecycle phase.
+
+    The blade workers are bound to their `ProcessPhase`, so the process
+    table is scanned once for all the plugins of the blade, and only the
+    domain processes are scanned when the phase has a tracker. The phases
+    may overlap (e.g. in a pipelined switch) without mixing their domains.
+    Outside of any phase, each query scans the whole host afresh.
+
+    The applications spawned from the host are only in the domain when the
+    tracker has a cgroup to `attach` them to; without one, their plugins
+    pass the `spawned` PIDs, which are looked up in procfs as well, and
+    never any other process of the same name on the host.
+    """
+    def __init__(self):
+        self.local = threading.local()
+        pass
+
+    def bind(self, worker, phase:ProcessPhase):
+        def _bound(*args):
+            self.local.phase = phase
+            try:
+                return worker(*args)
+            finally:
+                self.local.phase = None
+        return _bound
+
+    def tracker(self) -> DomainTracker:
+        _phase = getattr(self.local, 'phase', None)
+        return _phase.tracker if _phase else None
+
+    def attachable(self) -> bool:
+        _tracker = self.tracker()
+        return bool(_tracker and _tracker.cgroup)
+
+    def snapshot(self) -> ProcessSnapshot:
+        _phase = getattr(self.local, 'phase', None)
+        return _phase.snapshot() if _phase else ProcessSnapshot()
+
+    def by_name(self, name:str, spawned=()) -> list:
+        result = self.snapshot().by_name(name)
+        _tracker = self.tracker()
+        if spawned and _tracker and not _tracker.cgroup:
+            _pids = { x['pid'] for x in result }
+            _spawned = [ process_info(x) for x in spawned if x not in _pids ]
+            result = result + [ x for x in _spawned if x and x['name']==name ]
+        return result
+
+    def namespace(self, pid) -> list:
+        return self.snapshot().namespace(pid)
+
+    def kill(self, name:str, sig=signal.SIGTERM, spawned=()) -> int:
+        ## deliver to the processes of the name only, in the domain of the phase
+        count = 0
+        for info in self.by_name(name, spawned):
+            try:
+                os.kill(info['pid'], sig)
+                count += 1
+            except OSError:
+                pass
+        return count
+
+    pass
+
+GLOBAL_PROCESSES = ProcessTable()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+import argparse
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+
+from pyvdm.core.utils import (POSIX, )
+
+PARENT_ROOT = Path('~/.vdm').expanduser()
+TIMING_FILENAME = 'timing.json'
+NAMESPACE_KEY = '@namespace'
+WINDOW_SIZE = 256 #rolling window of samples per (plugin, phase)
+BUCKET_EDGES = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+                1, 2, 5, 10, 30, 60] #in seconds, the last bucket is unbounded
+
+def _percentile(values:list, ratio:float) -> float:
+    if not values: return 0.0
+    values = sorted(values)
+    return values[ min(len(values)-1, int(ratio*len(values))) ]
+
+def _histogram(values:list) -> dict:
+    _labels = [ f'<{x}s' for x in BUCKET_EDGES ] + [ f'>={BUCKET_EDGES[-1]}s' ]
+    buckets = { x:0 for x in _labels }
+    for value in values:
+        _idx = next( (i for i,x in enumerate(BUCKET_EDGES) if value<x), len(BUCKET_EDGES) )
+        buckets[ _labels[_idx] ] += 1
+    return { k:v for k,v in buckets.items() if v }
+
+class TimingStore:
+    def __init__(self, root=''):
+        if root:
+            self.root = Path(root).resolve()
+        else:
+            self.root = PARENT_ROOT
+        self.filename = self.root / TIMING_FILENAME
+        self.lock = threading.Lock()
+        self.records = self.load()
+        pass
+
+    def load(self) -> dict:
+        try:
+            with open(POSIX(self.filename), 'r') as fd:
+                return json.load(fd)
+        except:
+            return dict()
+
+    def flush(self):
+        with self.lock:
+            _content = json.dumps(self.records)
+        self.root.mkdir(parents=True, exist_ok=True)
+        _fd, _tmp = tempfile.mkstemp(dir=POSIX(self.root))
+        with os.fdopen(_fd, 'w') as fd:
+            fd.write(_content)
+        os.replace(_tmp, POSIX(self.filename))
+        pass
+
+    def reset(self, names=[]):
+        with self.lock:
+            if not names:
+                self.records.clear()
+            for name in names:
+                self.records.pop(name, None)
+        self.flush()
+        pass
+
+    def record(self, name:str, phase:str, wall:float, cpu:float):
+        with self.lock:
+            _samples = self.records.setdefault(name, {}).setdefault(phase, [])
+            _samples.append( [round(wall,6), round(cpu,6), int(time.time())] )
+            del _samples[:-WINDOW_SIZE]
+        pass
+
+    @contextmanager
+    def measure(self, name:str, phase:str):
+        _wall, _cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(name, phase, time.perf_counter()-_wall, time.thread_time()-_cpu)
+        pass
+
+    def summary(self, names=[]) -> dict:
+        result = dict()
+        with self.lock:
+            _records = { k:{p:list(s) for p,s in v.items()} for k,v in self.records.items() }
+        for name,phases in _records.items():
+            if names and name not in names: continue
+            for phase,samples in phases.items():
+                _wall = [ x[0] for x in samples ]
+                _cpu  = [ x[1] for x in samples ]
+                result.setdefault(name, {})[phase] = {
+                    'count': len(samples),
+                    'wall_p50': _percentile(_wall, 0.50),
+                    'wall_p90': _percentile(_wall, 0.90),
+                    'wall_max': max(_wall),
+                    'cpu_p50':  _percentile(_cpu, 0.50),
+                    'last_time': samples[-1][2],
+                    'histogram': _histogram(_wall),
+                }
+        return result
+
+    def show(self, names=[]):
+        _summary = self.summary(names)
+        print( '%-32s %-16s %6s %10s %10s %10s %10s'%('NAME', 'PHASE', 'COUNT', 'P50(ms)', 'P90(ms)', 'MAX(ms)', 'CPU(ms)') )
+        for name,phases in sorted(_summary.items()):
+            for phase,item in phases.items():
+                print( '%-32s %-16s %6d %10.1f %10.1f %10.1f %10.1f'%(name, phase, item['count'],
+                        item['wall_p50']*1E3, item['wall_p90']*1E3, item['wall_max']*1E3, item['cpu_p50']*1E3) )
+        return _summary
+
+    pass
+
+def execute(store, command, args, verbose=False):
+    assert( isinstance(store, TimingStore) )
+    if command=='show' or command==None:
+        return store.show( getattr(args, 'names', []) )
+    elif command=='dump':
+        ret = store.summary(args.names)
+        print( json.dumps(ret, indent=4) )
+        return ret
+    elif command=='reset':
+        return store.reset(args.names)
+    else:
+        print('The command <{}> is not supported.'.format(command))
+    return
+
+def init_subparsers(subparsers):
+    p_show = subparsers.add_parser('show',
+        help='show the lifecycle timing of plugins.')
+    p_show.add_argument('names', metavar='plugin_names', nargs='*',
+        help='(Optional) only show the specified plugins.')
+    #
+    p_dump = subparsers.add_parser('dump',
+        help='dump the lifecycle timing histograms in JSON.')
+    p_dump.add_argument('names', metavar='plugin_names', nargs='*',
+        help='(Optional) only dump the specified plugins.')
+    #
+    p_reset = subparsers.add_parser('reset',
+        help='reset the recorded lifecycle timing.')
+    p_reset.add_argument('names', metavar='plugin_names', nargs='*',
+        help='(Optional) only reset the specified plugins.')
+    pass
+
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(
+            description='VDM Lifecycle Profiler.')
+        subparsers = parser.add_subparsers(dest='command')
+        init_subparsers(subparsers)
+        #
+        args = parser.parse_args()
+        store = TimingStore()
+        ret = execute(store, args.command, args)
+    except Exception as e:
+        raise e#pass
+    finally:
+        pass#exit()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import concurrent.futures
+import heapq
+import time
+import traceback
+
+PRIORITY_CLASSES = {'core':0, 'high':1, 'normal':2, 'low':3}
+DEFAULT_PRIORITY = 'normal'
+WILDCARD = '*'
+START_POLL = 0.05 #the interval to check the queued plugins started (in seconds)
+
+class BladeScheduler:
+    """Dependency-aware scheduler for the plugin lifecycle phases.
+
+    Each plugin is a node of a DAG built from the optional `after`/`before`
+    hints; the ready nodes are dispatched by priority class, with at most
+    `max_workers` of them running at the same time. A plugin running over
+    its deadline is abandoned as a straggler, and its successors released;
+    the deadline starts when the plugin starts, never while it is queued
+    in the executor, so a queued plugin is never abandoned unrun.
+    """
+    def __init__(self, hints:dict, max_workers=None, deadlines:dict={}):
+        self.hints = hints
+        self.max_workers = max_workers
+        self.deadlines = deadlines
+        self.stragglers = list()
+        pass
+
+    @staticmethod
+    def priority(hint:dict) -> int:
+        _class = hint.get('priority', DEFAULT_PRIORITY)
+        return PRIORITY_CLASSES.get(_class, PRIORITY_CLASSES[DEFAULT_PRIORITY])
+
+    def build_graph(self, names:list, reverse=False) -> dict:
+        edges = { x:set() for x in names }
+        def _add_edge(src, dst):
+            if src==dst or (src not in edges) or (dst not in edges): return
+            if reverse: src, dst = dst, src
+            edges[src].add(dst)
+        ##
+        for name in names:
+            hint = self.hints.get(name, {})
+            for _prev in hint.get('after', []):
+                for x in (names if _prev==WILDCARD else [_prev]):
+                    _add_edge(x, name)
+            for _next in hint.get('before', []):
+                for x in (names if _next==WILDCARD else [_next]):
+                    _add_edge(name, x)
+        ## break the cycles (if any) by dropping the back edges only, found by DFS in the given order
+        _state = dict() #name -> 1 visiting, 2 visited
+        for root in names:
+            if root in _state: continue
+            _state[root] = 1
+            _stack = [ (root, iter([ y for y in names if y in edges[root] ])) ]
+            while _stack:
+                x, _next = _stack[-1]
+                y = next(_next, None)
+                if y is None:
+                    _state[x] = 2
+                    _stack.pop()
+                elif _state.get(y)==1:
+                    print(f'Dependency cycle detected on "{x}" -> "{y}", hint ignored.')
+                    edges[x].discard(y)
+                elif y not in _state:
+                    _state[y] = 1
+                    _stack.append( (y, iter([ z for z in names if z in edges[y] ])) )
+        return edges
+
+    def run(self, executor, worker, tasks:dict, reverse=False, abandoned=None) -> list:
+        """Run `worker(plugin, stat)` for each `{name: (plugin, stat)}` in tasks."""
+        names = list( tasks.keys() )
+        edges = self.build_graph(names, reverse)
+        indegree = { x:0 for x in names }
+        for _dsts in edges.values():
+            for x in _dsts: indegree[x] += 1
+        abandoned = set() if abandoned is None else abandoned
+        self.stragglers = list()
+        ##
+        ready = list()
+        def _push(name):
+            _prio = self.priority( self.hints.get(name, {}) )
+            heapq.heappush(ready, (_prio, names.index(name), name))
+        def _release(name):
+            for x in edges[name]:
+                indegree[x] -= 1
+                if indegree[x]==0: _push(x)
+        for x in names:
+            if indegree[x]==0: _push(x)
+        ##
+        max_workers = self.max_workers or len(names) or 1
+        started = dict() #name -> the time the worker started
+        def _timed(name):
+            def _run(*args):
+                started[name] = time.monotonic()
+                return worker(*args)
+            return _run
+        running, results = dict(), list()
+        while ready or running:
+            while ready and len(running)<max_workers:
+                _,_,name = heapq.heappop(ready)
+                _future = executor.submit(_timed(name), *tasks[name])
+                running[_future] = name
+            ##
+            _deadlined = { x:n for x,n in running.items() if self.deadlines.get(n) is not None }
+            expiry = { x:started[n]+self.deadlines[n] for x,n in _deadlined.items() if n in started }
+            _timeout = max(min(expiry.values())-time.monotonic(), 0) if expiry else None
+            if len(expiry) < len(_deadlined):
+                _timeout = min(_timeout, START_POLL) if _timeout is not None else START_POLL
+            done,_ = concurrent.futures.wait(running, timeout=_timeout,
+                                            return_when=concurrent.futures.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                try:
+                    ret = task.result()
+                    if ret is not None:
+                        results.append(ret)
+                except Exception as e:
+                    print( traceback.format_exc() )
+                ## release the successors regardless of the result
+                _release(name)
+            ## abandon the stragglers over deadline, they keep running in the executor
+            _now = time.monotonic()
+            for task in [ x for x,t in expiry.items() if t<=_now and x in running ]:
+                name = running.pop(task)
+                abandoned.add(name)
+                self.stragglers.append(name)
+                _release(name)
+        return results
+
+    pass
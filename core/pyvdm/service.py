@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+import json
+import os
+from pathlib import Path
+import socket
+import socketserver
+import threading
+import traceback
+
+import pyvdm.core.errcode as errcode
+from pyvdm.core.utils import (POSIX, )
+
+PARENT_ROOT = Path('~/.vdm').expanduser()
+SOCKET_FILENAME = 'control.sock'
+SOCKET_TIMEOUT = 600 #the longest operation over the socket (in seconds)
+EXPORTED_METHODS = ['status', 'save_domain', 'open_domain', 'close_domain',
+                    'switch_domain', 'prewarm_domain', 'discard_standby', 'autosave']
+
+def _encode(obj):
+    if isinstance(obj, errcode.ErrorCode):
+        return { '__errcode__': [type(obj).__name__, obj.name] }
+    if isinstance(obj, (list, tuple)):
+        return [ _encode(x) for x in obj ]
+    if isinstance(obj, dict):
+        return { k:_encode(v) for k,v in obj.items() }
+    return obj
+
+def _decode(obj):
+    if isinstance(obj, dict) and '__errcode__' in obj:
+        _type, _name = obj['__errcode__']
+        return getattr(errcode, _type)[_name]
+    if isinstance(obj, list):
+        return tuple( _decode(x) for x in obj )
+    if isinstance(obj, dict):
+        return { k:_decode(v) for k,v in obj.items() }
+    return obj
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = {'result': self.server.dispatch(request['method'], request.get('kwargs', {}))}
+            except Exception as e:
+                response = {'error': traceback.format_exc()}
+            self.wfile.write( (json.dumps(_encode(response))+'\n').encode() )
+            self.wfile.flush()
+        pass
+    pass
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, core, root=''):
+        self.core = core
+        self.root = Path(root).resolve() if root else PARENT_ROOT
+        self.address = self.root / SOCKET_FILENAME
+        self.lock = getattr(core, 'lock', None) or threading.RLock() #one domain operation at a time
+        ## take over the stale socket file
+        if self.address.exists():
+            if ControlClient(self.root).available():
+                raise Exception('Control daemon already running.')
+            self.address.unlink()
+        super().__init__(POSIX(self.address), _RequestHandler)
+        os.chmod(POSIX(self.address), 0o600)
+        pass
+
+    def status(self) -> dict:
+        return {
+            'name': self.core.dm.open_domain_name,
+            'stragglers': list(self.core.stragglers),
+            'save_report': self.core.save_report,
+        }
+
+    def dispatch(self, method:str, kwargs:dict):
+        if method not in EXPORTED_METHODS:
+            raise Exception(f'Unsupported method: {method}.')
+        if method=='status':
+            return self.status()
+        with self.lock:
+            return getattr(self.core, method)(**kwargs)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.address.unlink(missing_ok=True)
+        pass
+
+    pass
+
+class ControlClient:
+    def __init__(self, root=''):
+        self.root = Path(root).resolve() if root else PARENT_ROOT
+        self.address = self.root / SOCKET_FILENAME
+        pass
+
+    def available(self) -> bool:
+        if not self.address.exists():
+            return False
+        try:
+            self.call('status', timeout=1)
+            return True
+        except:
+            return False
+
+    def call(self, method:str, timeout=SOCKET_TIMEOUT, **kwargs):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect( POSIX(self.address) )
+            sock.sendall( (json.dumps({'method':method, 'kwargs':kwargs})+'\n').encode() )
+            with sock.makefile('rb') as fd:
+                response = json.loads( fd.readline() )
+        if 'error' in response:
+            raise Exception( response['error'] )
+        return _decode( response['result'] )
+
+    def status(self) -> dict:
+        return self.call('status')
+
+    def save_domain(self, delayed=False, incremental=False, names=None):
+        return self.call('save_domain', delayed=delayed, incremental=incremental, names=names)
+
+    def open_domain(self, name):
+        return self.call('open_domain', name=name)
+
+    def close_domain(self):
+        return self.call('close_domain')
+
+    def switch_domain(self, name, pipelined=True):
+        return self.call('switch_domain', name=name, pipelined=pipelined)
+
+    def prewarm_domain(self, name=None, mode='frequency'):
+        return self.call('prewarm_domain', name=name, mode=mode)
+
+    def discard_standby(self):
+        return self.call('discard_standby')
+
+    def autosave(self, enabled=True, **policy):
+        return self.call('autosave', enabled=enabled, **policy)
+
+    pass
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
+import base64
 from configparser import RawConfigParser
+import hashlib
+import importlib
 import json
+import os
 from os import chdir
 from pathlib import Path
 import random
@@ -9,18 +13,39 @@ import string
 import subprocess as sp
 import sys
 import tempfile
+import threading
+import time
+import types
 
 STAT_POSTFIX = 'stat'
+STAT_EXCHANGE_BUFFER = 'buffer'
+KEY_CACHE_TTL = 300 #the keyring lookups are cached for (in seconds)
 POSIX  = lambda x: x.as_posix() if hasattr(x, 'as_posix') else x
 SHELL_RUN = lambda x: sp.run(x, capture_output=True, check=True, shell=True)
 SHELL_POPEN = lambda x: sp.Popen(x, stdin=sp.PIPE, stdout=sp.PIPE, stderr=sp.PIPE, shell=True, text=True)
 
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, attr):
+        ## import the real module on the first attribute access
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update( module.__dict__ )
+        return getattr(module, attr)
+    pass
+
+def lazy_import(name:str):
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
+
 class KeyringEnDec:
-    import crypt
-    from cryptography.fernet import Fernet
-    import keyring
+    crypt   = property( lambda self: lazy_import('crypt') )
+    keyring = property( lambda self: lazy_import('keyring') )
+    Fernet  = property( lambda self: lazy_import('cryptography.fernet').Fernet )
 
-    def __init__(self, default_password='pyvdm'):
+    def __init__(self, default_password='pyvdm', ttl=KEY_CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock() #shared by the plugin workers
+        self.ciphers = dict() #service -> (key, cipher, expiry)
         self.set_default_password( default_password )
         pass
 
@@ -29,7 +54,8 @@ class KeyringEnDec:
         return self.crypt.crypt(password, _salt)
 
     def set_default_password(self, password:str):
-        self.default_password = self.salted_password(password)
+        self.default_password = password
+        self.invalidate()
         pass
 
     def set_password(self, service:str, password:str):
@@ -39,22 +65,62 @@ class KeyringEnDec:
         # store salted password
         salted_password = self.salted_password( password )
         self.keyring.set_password('pyvdm', service, salted_password)
+        self.invalidate(service)
         pass
 
+    def invalidate(self, service=None):
+        with self.lock:
+            if service is None:
+                self.ciphers.clear()
+            else:
+                self.ciphers.pop(service, None)
+        pass
+
+    def derive_key(self, password:str) -> bytes:
+        ## Fernet takes the urlsafe base64 of 32 bytes
+        return base64.urlsafe_b64encode( hashlib.sha256(password.encode()).digest() )
+
+    def keys_of(self, services) -> dict:
+        ## resolve the keys of all the services in one pass, only the expired ones hit the keyring
+        result, _now = dict(), time.monotonic()
+        with self.lock:
+            for service in set(services):
+                _key, _cipher, _expiry = self.ciphers.get(service, (None, None, 0))
+                if _expiry <= _now:
+                    password = self.keyring.get_password('pyvdm', service)
+                    password = password if password else self.default_password
+                    _key = self.derive_key(password)
+                    self.ciphers[service] = (_key, self.Fernet(_key), _now+self.ttl)
+                result[service] = self.ciphers[service]
+        return result
+
+    def ciphers_of(self, services) -> dict:
+        return { k:v[1] for k,v in self.keys_of(services).items() }
+
+    def key(self, service:str) -> bytes:
+        return self.keys_of([service])[service][0]
+
+    def cipher(self, service:str):
+        return self.keys_of([service])[service][1]
+
     def encrypt(self, service:str, data:str) -> str:
-        password = self.keyring.get_password('pyvdm', service)
-        password = password if password else self.default_password
-        ##
-        data = self.Fernet(password).encrypt( data.encode() ).decode()
+        data = self.cipher(service).encrypt( data.encode() ).decode()
         return data
 
     def decrypt(self, service:str, data:str) -> str:
-        password = self.keyring.get_password('pyvdm', service)
-        password = password if password else self.default_password
-        ##
-        data = self.Fernet(password).decrypt( data.encode() ).decode()
+        data = self.cipher(service).decrypt( data.encode() ).decode()
         return data
 
+    def encrypt_many(self, items:list) -> list:
+        """Encrypt the `(service, data)` pairs, in order."""
+        _ciphers = self.ciphers_of( x[0] for x in items )
+        return [ _ciphers[service].encrypt( data.encode() ).decode() for service,data in items ]
+
+    def decrypt_many(self, items:list) -> list:
+        """Decrypt the `(service, data)` pairs, in order."""
+        _ciphers = self.ciphers_of( x[0] for x in items )
+        return [ _ciphers[service].decrypt( data.encode() ).decode() for service,data in items ]
+
 class Tui:
     def __init__(self):
         pass
@@ -152,47 +218,200 @@ class WorkSpace:
         pass
     pass
 
+class StatBuffer:
+    """The stat exchanged with one plugin call, kept in memory.
+
+    It is backed by a memfd, so the filename-based plugins (also the `.so`
+    and the isolated ones) get `path` to open, while the buffer-based ones
+    get a file object from `open()`. Nothing is written to disk until the
+    buffer is dumped at commit.
+    """
+    fd, temp, files = None, '', []
+
+    def __init__(self, name=''):
+        if hasattr(os, 'memfd_create'):
+            self.fd = os.memfd_create(f'vdm-{name}', os.MFD_CLOEXEC)
+            self.path = f'/proc/{os.getpid()}/fd/{self.fd}'
+        else:
+            self.fd, self.temp = tempfile.mkstemp()
+            self.path = self.temp
+        self.files = list()
+        pass
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def size(self) -> int:
+        return os.fstat(self.fd).st_size
+
+    def load(self, filename):
+        with open(POSIX(filename), 'rb') as fd:
+            _size, _offset = os.fstat(fd.fileno()).st_size, 0
+            while _offset < _size:
+                _sent = os.sendfile(self.fd, fd.fileno(), _offset, _size-_offset)
+                if not _sent: break
+                _offset += _sent
+        pass
+
+    def open(self, mode='r+b'):
+        ## an independent file object at the beginning, closed on `release`
+        _file = os.fdopen(os.dup(self.fd), mode)
+        _file.seek(0)
+        self.files.append(_file)
+        return _file
+
+    def release(self):
+        for _file in self.files:
+            try:
+                _file.close()
+            except:
+                pass
+        self.files = list()
+        pass
+
+    def chunks(self, chunk_size=64*1024):
+        _offset = 0
+        while True:
+            chunk = os.pread(self.fd, chunk_size, _offset)
+            if not chunk: break
+            _offset += len(chunk)
+            yield chunk
+        pass
+
+    def read(self) -> bytes:
+        return b''.join( self.chunks() )
+
+    def digest(self) -> str:
+        _hash = hashlib.blake2b(digest_size=16)
+        for chunk in self.chunks():
+            _hash.update(chunk)
+        return _hash.hexdigest()
+
+    def dump(self, filename):
+        with open(POSIX(filename), 'wb') as fd:
+            for chunk in self.chunks():
+                fd.write(chunk)
+        pass
+
+    def close(self):
+        self.release()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        if self.temp:
+            Path(self.temp).unlink(missing_ok=True)
+            self.temp = ''
+        pass
+
+    pass
+
 class StatFile:
     def __init__(self, root, prefix='', touch=True):
         self.root = root
+        self.prefix = prefix
         _stat_file = f'{prefix}.{STAT_POSTFIX}'
-        self.stat_file = Path(root, _stat_file).resolve()
+        self.stat_file = Path(root, _stat_file).absolute() #keep the symlinks
         self.stat_file.touch(exist_ok=True)
-        self.temp_file = ''
+        self.buffer = None
+        self._digest, self._digest_key = '', None
+        self._stat, self._stat_key = dict(), None
         pass
 
     def __del__(self):
-        if self.temp_file:
-            Path(self.temp_file).unlink(missing_ok=True)
+        self.release()
 
     def touch(self):
         self.stat_file.touch(exist_ok=True)
         pass
 
-    def getFile(self):
-        _,self.temp_file = tempfile.mkstemp()
-        shutil.copy( POSIX(self.stat_file), self.temp_file )
-        return self.temp_file
+    def getBuffer(self, load=True) -> StatBuffer:
+        self.release()
+        self.buffer = self.lease(load)
+        return self.buffer
 
-    def putFile(self):
-        shutil.move( self.temp_file, POSIX(self.stat_file) )
+    def getFile(self) -> str:
+        ## the adapter for the filename-based plugins
+        return self.getBuffer().path
+
+    def lease(self, load=True) -> StatBuffer:
+        ## a buffer owned by one plugin call, closed (or staged) by the call only:
+        ## the `path` of a straggler never points to a reused fd
+        _buffer = StatBuffer(self.prefix)
+        if load:
+            _buffer.load(self.stat_file)
+        return _buffer
+
+    def hold(self, buffer:StatBuffer):
+        ## keep a leased buffer for the later `putFile`
+        self.release()
+        self.buffer = buffer
         pass
 
-    def getStat(self) -> dict:
+    def release(self):
+        if self.buffer:
+            self.buffer.close()
+        self.buffer = None
+        pass
+
+    def fingerprint(self) -> str:
+        _st = self.stat_file.stat()
+        _key = (_st.st_mtime_ns, _st.st_size)
+        if self._digest_key!=_key:
+            self._digest, self._digest_key = file_digest(self.stat_file), _key
+        return self._digest
+
+    def stage(self, incremental=False, buffer:StatBuffer=None):
+        ## the given leased buffer, or the held one
+        if buffer is None:
+            buffer, self.buffer = self.buffer, None
+        if not buffer:
+            return None
+        buffer.release() #flush the plugin-side file objects
+        ## skip the commit if the output is identical to the committed one
+        if incremental:
+            if buffer.size==self.stat_file.stat().st_size and buffer.digest()==self.fingerprint():
+                buffer.close()
+                return None
+        ## the caller takes over the buffer
+        return buffer
+
+    def putFile(self, incremental=False) -> bool:
+        _staged = self.stage(incremental)
+        if not _staged:
+            return False
+        _staged.dump( f'{self.stat_file}.tmp' )
+        os.replace( f'{self.stat_file}.tmp', POSIX(self.stat_file) )
+        _staged.close()
+        return True
+
+    def readStat(self) -> dict:
         with open(POSIX(self.stat_file), 'r') as fd:
             _name = fd.readline().strip()
             try:
-                _stat = dict([ x.split('=') for x in fd.readlines() ])
+                _stat = dict([ x.strip().split('=') for x in fd.readlines() ])
             except:
                 _stat = {}
             _stat['name'] = _name
         return _stat
 
+    def getStat(self) -> dict:
+        ## re-read only when the file is replaced or modified, also by other processes
+        _st = self.stat_file.stat()
+        _key = (_st.st_ino, _st.st_mtime_ns, _st.st_size)
+        if self._stat_key!=_key:
+            self._stat, self._stat_key = self.readStat(), _key
+        return dict(self._stat)
+
     def putStat(self, name:str, **stat) -> bool:
+        ## the only writer, replace the file as a whole for the readers
         try:
-            with open(POSIX(self.stat_file), 'w') as fd:
+            _temp = f'{self.stat_file}.tmp'
+            with open(_temp, 'w') as fd:
                 _stat = [ f'{k}={v}'.strip() for k,v in stat.items() ]
                 fd.writelines([x+'\n' for x in (name, *_stat)])
+            os.replace( _temp, POSIX(self.stat_file) )
+            self._stat_key = None
             return True
         except Exception as e:
             return False
@@ -220,6 +439,13 @@ def json_dump(filename, config):
     fd.close()
     pass
 
+def file_digest(filename, chunk_size=64*1024) -> str:
+    _hash = hashlib.blake2b(digest_size=16)
+    with open(POSIX(filename), 'rb') as fd:
+        for chunk in iter(lambda: fd.read(chunk_size), b''):
+            _hash.update(chunk)
+    return _hash.hexdigest()
+
 def retry_with_timeout(lamb_fn, default=None, timeout=1):
     import time
     _now = time.time()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+import ctypes
+import os
+from pathlib import Path
+import select
+import struct
+import threading
+import time
+
+IN_MODIFY      = 0x00000002
+IN_ATTRIB      = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF   = 0x00000800
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO \
+           | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct('iIII') #wd, mask, cookie, len
+
+class _Inotify:
+    def __init__(self):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = dict() #wd -> directory
+        pass
+
+    def add(self, directory:Path) -> bool:
+        wd = self.libc.inotify_add_watch(self.fd, str(directory).encode(), WATCH_MASK)
+        if wd < 0:
+            return False
+        self.watches[wd] = directory
+        return True
+
+    def read(self, timeout:float):
+        ## -> (changed paths, lost directories, overflowed)
+        changed, lost, overflow = set(), set(), False
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return changed, lost, overflow
+        try:
+            data = os.read(self.fd, 64*1024)
+        except BlockingIOError:
+            return changed, lost, overflow
+        _offset = 0
+        while _offset < len(data):
+            wd, mask, _, _length = _EVENT.unpack_from(data, _offset)
+            _name = data[_offset+_EVENT.size : _offset+_EVENT.size+_length].rstrip(b'\0').decode(errors='ignore')
+            _offset += _EVENT.size + _length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            elif mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                if wd in self.watches: lost.add( self.watches.pop(wd) )
+            elif wd in self.watches and _name:
+                changed.add( self.watches[wd] / _name )
+        return changed, lost, overflow
+
+    def close(self):
+        os.close(self.fd)
+        pass
+
+    pass
+
+class DirectoryWatcher:
+    """Report the changed files under the directories, via inotify or polling.
+
+    `callback(paths)` is called from the watcher thread with the set of the
+    created, modified or removed files matching `pattern`, coalesced over
+    `settle` seconds; or with `None` when the events are lost and all the
+    files should be rescanned. The missing directories are picked up once
+    created.
+    """
+    def __init__(self, directories, callback, pattern='*', interval=2.0, settle=0.2, polling=False):
+        self.directories = [ Path(x).expanduser() for x in directories ]
+        self.callback = callback
+        self.pattern = pattern
+        self.interval, self.settle = interval, settle
+        self.polling = polling
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.snapshots = dict() #directory -> {path: (mtime_ns, size)}, for polling
+        pass
+
+    def snapshot(self, directory:Path) -> dict:
+        result = dict()
+        for _file in directory.glob(self.pattern):
+            try:
+                _st = _file.stat()
+                result[_file] = (_st.st_mtime_ns, _st.st_size)
+            except OSError:
+                pass
+        return result
+
+    def poll(self) -> set:
+        changed = set()
+        for directory in self.directories:
+            _old, _new = self.snapshots.get(directory, {}), self.snapshot(directory)
+            changed.update( x for x in _old.keys() | _new.keys() if _old.get(x)!=_new.get(x) )
+            self.snapshots[directory] = _new
+        return changed
+
+    def __emit(self, changed):
+        if changed is not None:
+            changed = { x for x in changed if x.match(self.pattern) }
+        if changed is None or changed:
+            try:
+                self.callback(changed)
+            except Exception as e:
+                print(f'Watcher callback failed: {e}')
+        pass
+
+    def __run_polling(self):
+        self.poll()
+        while not self.stop_event.wait(self.interval):
+            self.__emit( self.poll() )
+        pass
+
+    def __run_inotify(self, inotify:_Inotify):
+        def _attach():
+            ## watch the (re-)appeared directories, their files are all new
+            changed = set()
+            for directory in self.directories:
+                if directory not in inotify.watches.values() and directory.is_dir() and inotify.add(directory):
+                    changed.update( directory.glob(self.pattern) )
+            return changed
+        _attach()
+        while not self.stop_event.is_set():
+            changed, lost, overflow = inotify.read(self.interval)
+            if changed and not overflow:
+                time.sleep(self.settle) #coalesce the burst of a package upgrade
+                _more, _lost, overflow = inotify.read(0)
+                changed |= _more; lost |= _lost
+            if overflow or lost:
+                _attach()
+                self.__emit(None) #the events are lost, rescan all
+                continue
+            changed |= _attach()
+            self.__emit(changed)
+        inotify.close()
+        pass
+
+    def start(self):
+        self.stop_event.clear()
+        _inotify = None
+        if not self.polling:
+            try:
+                _inotify = _Inotify()
+            except (OSError, AttributeError):
+                _inotify = None #fallback to polling
+        if _inotify:
+            _target, _args = self.__run_inotify, (_inotify,)
+        else:
+            _target, _args = self.__run_polling, ()
+        self.thread = threading.Thread(target=_target, args=_args, name='vdm-watcher', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread: self.thread.join()
+        self.thread = None
+        pass
+
+    pass
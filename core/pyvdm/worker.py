@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import multiprocessing as mp
+import threading
+import traceback
+
+ISOLATION_THREAD  = 'thread'    #run in the core process (default)
+ISOLATION_PROCESS = 'process'   #run in a dedicated worker process
+## any other value of `isolation` names a worker shared by the plugins
+SPAWN_CONTEXT = mp.get_context('spawn') #never fork the threaded core
+
+def _serve(conn):
+    from pyvdm.core.PluginManager import (PluginWrapper, has_change_hint)
+    plugins = dict()
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        ## request: (command, name, *args); response: (ok, result)
+        command, name, args = request[0], request[1], request[2:]
+        try:
+            if command=='load':
+                _root, _entry = args
+                plugins[name] = PluginWrapper(_entry, _root)
+                result = None
+            elif command=='call':
+                _method, _args = args
+                if hasattr(plugins[name].obj, _method):
+                    result = getattr(plugins[name], _method)(*_args)
+                else:
+                    result = 1 if _method=='onChanged' else 0
+            elif command=='hinted':
+                result = has_change_hint(plugins[name].obj)
+            elif command=='exit':
+                break
+            conn.send( (True, result) )
+        except Exception:
+            conn.send( (False, traceback.format_exc()) )
+    pass
+
+class PluginWorker:
+    """Long-lived process hosting one or more plugins, restarted on crash."""
+    def __init__(self, group:str):
+        self.group = group
+        self.lock = threading.Lock() #one request in flight
+        self.loaded = dict() #name -> (root, entry), replayed on restart
+        self.process, self.conn = None, None
+        pass
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        self.conn, _child = SPAWN_CONTEXT.Pipe()
+        self.process = SPAWN_CONTEXT.Process(target=_serve, args=(_child,),
+                            name=f'vdm-worker-{self.group}', daemon=True)
+        self.process.start()
+        _child.close()
+        for name,(root,entry) in list(self.loaded.items()):
+            try:
+                self.__request('load', name, root, entry)
+            except Exception:
+                print( f'Plugin "{name}" failed to reload in worker "{self.group}".' )
+                self.loaded.pop(name)
+        pass
+
+    def stop(self):
+        with self.lock:
+            if self.alive:
+                try:
+                    self.conn.send( ('exit', '') )
+                    self.process.join(1)
+                except:
+                    pass
+                if self.process.is_alive():
+                    self.process.kill()
+            self.process, self.conn = None, None
+        pass
+
+    def kill(self):
+        ## unblock the pending request, which then restarts the worker
+        if self.process: self.process.kill()
+        pass
+
+    def __request(self, *request):
+        self.conn.send(request)
+        ok, result = self.conn.recv()
+        if not ok:
+            raise Exception(result) #the remote traceback
+        return result
+
+    def request(self, *request):
+        with self.lock:
+            try:
+                if not self.alive:
+                    self.start()
+                return self.__request(*request)
+            except (EOFError, OSError):
+                ## the worker crashed, restart it for the next call
+                print( f'Plugin worker "{self.group}" crashed on {request[:3]}, restarted.' )
+                if self.process: self.process.kill()
+                self.process = None
+                return -1
+
+    def load(self, name:str, root:str, entry:str):
+        self.loaded[name] = (root, entry)
+        try:
+            self.request('load', name, root, entry)
+        except:
+            self.loaded.pop(name)
+            raise
+        return IsolatedPlugin(self, name)
+
+    pass
+
+class IsolatedPlugin:
+    """Forward the SRC_API calls of a plugin to its worker process."""
+    def __init__(self, worker:PluginWorker, name:str):
+        self.worker = worker
+        self.name = name
+        self._hinted = None
+
+    def onStart(self):
+        return self.worker.request('call', self.name, 'onStart', ())
+
+    def onStop(self):
+        return self.worker.request('call', self.name, 'onStop', ())
+
+    def onSave(self, stat_file):
+        return self.worker.request('call', self.name, 'onSave', (stat_file,))
+
+    def onResume(self, stat_file, new=False):
+        return self.worker.request('call', self.name, 'onResume', (stat_file, new))
+
+    def onClose(self):
+        return self.worker.request('call', self.name, 'onClose', ())
+
+    def onChanged(self):
+        return self.worker.request('call', self.name, 'onChanged', ())
+
+    @property
+    def hinted(self) -> bool:
+        ## asked once, the plugin code is fixed for the worker
+        if self._hinted is None:
+            self._hinted = self.worker.request('hinted', self.name)==True
+        return self._hinted
+
+    pass
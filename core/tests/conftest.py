@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+import importlib.util
+from pathlib import Path
+import sys
+import types
+
+## the source tree is "core/pyvdm", built as "pyvdm/core"
+SOURCE_ROOT = Path(__file__).resolve().parent.parent / 'pyvdm'
+
+try:
+    importlib.import_module('pyvdm.core')
+except ImportError:
+    _pkg = sys.modules.get('pyvdm') or types.ModuleType('pyvdm')
+    _pkg.__path__ = getattr(_pkg, '__path__', [])
+    sys.modules['pyvdm'] = _pkg
+    _spec = importlib.util.spec_from_file_location('pyvdm.core', SOURCE_ROOT / '__init__.py',
+                                submodule_search_locations=[str(SOURCE_ROOT)])
+    _core = importlib.util.module_from_spec(_spec)
+    sys.modules['pyvdm.core'] = _core
+    _spec.loader.exec_module(_core)
+    _pkg.core = _core
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import threading
+import types
+
+import pytest
+
+from pyvdm.core import autosave
+from pyvdm.core.autosave import AutosaveEngine
+from pyvdm.core.errcode import DomainCode
+
+POLICY = {'debounce':5, 'max_staleness':60, 'hint_interval':10}
+
+class Clock:
+    def __init__(self): self.now = 1000.0
+    def __call__(self): return self.now
+
+class Plugin:
+    def __init__(self, name, hinted=False, changed=0):
+        self.name, self.hinted, self.changed = name, hinted, changed
+    def onChanged(self): return self.changed
+
+class Core:
+    def __init__(self, plugins):
+        self.pids = {1, 2}
+        self.plugins = plugins
+        self.app_plugins = ['app']
+        self.lock = threading.RLock()
+        self.saves = list()
+        self.result = DomainCode.ALL_CLEAN
+        self.windows = { 1:[{'xid':11, 'desktop':0, 'states':[], 'xyhw':[0,0,100,100]}] }
+        self.dm = types.SimpleNamespace(open_domain_name='domain',
+                    tracker=lambda: types.SimpleNamespace(pids=lambda: list(self.pids)))
+        self.global_plugin = types.SimpleNamespace(xm=types.SimpleNamespace(get_current_desktop=lambda: 0,
+                                get_windows_by_pid=lambda pid: self.windows.get(pid, [])))
+    def save_domain(self, incremental=False, names=None):
+        self.saves.append(names)
+        return (self.result, '')
+
+@pytest.fixture
+def clock(monkeypatch):
+    _clock = Clock()
+    monkeypatch.setattr(autosave.time, 'monotonic', _clock)
+    return _clock
+
+def test_clean_domain_is_never_due(clock):
+    engine = AutosaveEngine(Core([Plugin('app')]), **POLICY)
+    engine.step()
+    clock.now += 1000
+    assert engine.step() is None
+    assert engine.due() == ''
+
+def test_debounced_until_quiet(clock):
+    core = Core([Plugin('app')])
+    engine = AutosaveEngine(core, **POLICY)
+    engine.step()
+    core.pids.add(3)
+    clock.now += 1
+    assert engine.step() is None
+    assert engine.dirty == {'app'}
+    ## a new event postpones the save
+    clock.now += 4
+    core.pids.add(4)
+    assert engine.step() is None
+    clock.now += 5
+    assert engine.due() == 'dirty'
+    engine.step()
+    assert core.saves == [['app']]
+    assert engine.dirty == set() and engine.first_dirty is None
+
+def test_stale_after_max_staleness(clock):
+    core = Core([Plugin('app')])
+    engine = AutosaveEngine(core, **POLICY)
+    engine.step()
+    for _ in range(20):
+        clock.now += 4
+        core.pids.add( max(core.pids)+1 ) #never quiet for the debounce
+        engine.poll_signals()
+        if engine.due(): break
+    assert engine.due() == 'stale'
+    assert clock.now-engine.first_dirty >= POLICY['max_staleness']
+
+def test_only_hinted_plugins_are_asked(clock):
+    hinted, silent = Plugin('hinted', hinted=True, changed=1), Plugin('silent', hinted=False, changed=1)
+    engine = AutosaveEngine(Core([hinted, silent]), **POLICY)
+    clock.now += POLICY['hint_interval']
+    engine.poll_signals()
+    assert engine.dirty == {'hinted'}
+    ## the hints are not events, the save waits only for the debounce from the first one
+    assert engine.due() == ''
+    clock.now += POLICY['debounce']
+    assert engine.due() == 'dirty'
+
+def test_busy_core_retries_later(clock):
+    core = Core([Plugin('app')])
+    engine = AutosaveEngine(core, **POLICY)
+    engine.step()
+    core.pids.add(3)
+    engine.step()
+    clock.now += POLICY['debounce']
+    _holder = threading.Thread(target=core.lock.acquire)
+    _holder.start(); _holder.join()
+    assert engine.step() is None
+    assert core.saves == [] and engine.dirty == {'app'}
+
+def test_window_geometry_marks_dirty(clock):
+    core = Core([Plugin('app')])
+    engine = AutosaveEngine(core, **POLICY)
+    engine.step()
+    core.windows[1][0]['xyhw'] = [10,10,100,100]
+    clock.now += 1
+    engine.step()
+    assert engine.dirty == {'app'}
+    clock.now += POLICY['debounce']
+    engine.step()
+    assert core.saves == [['app']]
+
+def test_failed_save_keeps_changes(clock):
+    core = Core([Plugin('app')])
+    engine = AutosaveEngine(core, **POLICY)
+    engine.step()
+    core.pids.add(3)
+    engine.step()
+    clock.now += POLICY['debounce']
+    core.result = DomainCode.DOMAIN_SAVE_FAILED
+    engine.step()
+    assert engine.dirty == {'app'} and engine.first_dirty
+    ## retried after the back-off only
+    clock.now += 1
+    assert engine.step() is None
+    core.result = DomainCode.ALL_CLEAN
+    clock.now += POLICY['debounce']
+    engine.step()
+    assert core.saves == [['app'], ['app']]
+    assert engine.dirty == set()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+from concurrent.futures import ThreadPoolExecutor
+import json
+
+import pytest
+
+from pyvdm.core import codec
+from pyvdm.core.codec import (dump_legacy, dump_records, load_records)
+
+RECORDS = [ {'cmdline':['app', str(i)], 'window':{'desktop':i%4, 'xyhw':[i,i,i,i]}} for i in range(200) ]
+
+class ThreadOffload:
+    ## the process pool is replaced by threads, the frames are the same
+    max_workers, enabled = 2, True
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(self.max_workers)
+    def submit(self, data, key=None, compress=True, level=codec.COMPRESS_LEVEL):
+        return self.pool.submit(codec.encode_frame, data, key, compress, level)
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(codec, 'CHUNK_SIZE', 512)
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_round_trip(tmp_path, small_chunks, compress):
+    stat_file = tmp_path / 'a.stat'
+    dump_records(iter(RECORDS), stat_file, compress=compress)
+    assert stat_file.read_bytes()[:4] == codec.STAT_MAGIC
+    assert list( load_records(stat_file) ) == RECORDS
+
+def test_round_trip_framed(tmp_path, small_chunks):
+    stat_file = tmp_path / 'a.stat'
+    dump_records(RECORDS, stat_file, offload=ThreadOffload())
+    assert stat_file.read_bytes()[5] & codec.FLAG_FRAMED
+    assert list( load_records(stat_file) ) == RECORDS
+
+def test_legacy_fallback(tmp_path):
+    stat_file = tmp_path / 'a.stat'
+    dump_legacy(RECORDS, stat_file)
+    ## readable by the older releases as is
+    assert json.loads( stat_file.read_text() ) == RECORDS
+    assert list( load_records(stat_file) ) == RECORDS
+
+def test_empty_legacy_file(tmp_path):
+    stat_file = tmp_path / 'a.stat'
+    stat_file.touch()
+    assert list( load_records(stat_file) ) == []
+
+def test_newer_version_is_rejected(tmp_path):
+    stat_file = tmp_path / 'a.stat'
+    stat_file.write_bytes( codec._HEADER.pack(codec.STAT_MAGIC, codec.STAT_VERSION+1, 0) )
+    with pytest.raises(ValueError):
+        list( load_records(stat_file) )
+
+def test_encrypted_round_trip(tmp_path, small_chunks):
+    fernet = pytest.importorskip('cryptography.fernet')
+    key = fernet.Fernet.generate_key()
+    stat_file, legacy_file = tmp_path / 'a.stat', tmp_path / 'b.stat'
+    dump_records(RECORDS, stat_file, key)
+    dump_legacy(RECORDS, legacy_file, key)
+    assert list( load_records(stat_file, key) ) == RECORDS
+    assert list( load_records(legacy_file, key) ) == RECORDS
+    ## the single token encrypted by the offload
+    dump_legacy(RECORDS, legacy_file, key, ThreadOffload())
+    assert list( load_records(legacy_file, key) ) == RECORDS
+    with pytest.raises(ValueError):
+        list( load_records(stat_file) )
+
+def test_round_trip_through_buffer(small_chunks):
+    from pyvdm.core.utils import StatBuffer
+    _buffer = StatBuffer('test')
+    for _dump in [ lambda fd: dump_records(RECORDS, fd), lambda fd: dump_legacy(RECORDS, fd) ]:
+        _file = _buffer.open('w+b')
+        _file.truncate(0)
+        assert codec.is_empty(_file)
+        _dump(_file)
+        _buffer.release()
+        assert list( load_records(_buffer.open('rb')) ) == RECORDS
+        _buffer.release()
+    _buffer.close()
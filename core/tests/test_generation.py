@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+from concurrent.futures import ThreadPoolExecutor
+
+from pyvdm.core.generation import (GenerationStore, ObjectStore)
+from pyvdm.core.utils import (STAT_POSTFIX, StatBuffer)
+
+def _buffer(data:bytes) -> StatBuffer:
+    _buf = StatBuffer('test')
+    with _buf.open() as fd:
+        fd.write(data)
+    _buf.release()
+    return _buf
+
+def _stat(name): return f'{name}.{STAT_POSTFIX}'
+
+def _blobs(objects:ObjectStore) -> dict:
+    return { x.name:x.stat().st_nlink for x in objects.root.glob('*/*') if not x.name.startswith('.') }
+
+def _store(tmp_path, name='domain'):
+    objects = ObjectStore(tmp_path / 'objects')
+    return GenerationStore(tmp_path / name, objects), objects
+
+def test_commit_links_untouched_and_flips(tmp_path):
+    store, objects = _store(tmp_path)
+    first = store.commit({ _stat('a'):_buffer(b'A1'), _stat('b'):_buffer(b'B1') })
+    second = store.commit({ _stat('a'):_buffer(b'A2') })
+    assert store.current() == second
+    assert (store.directory / _stat('a')).read_bytes() == b'A2'
+    assert (store.directory / _stat('b')).read_bytes() == b'B1'
+    assert store.manifest(second)['parent'] == first.name
+    ## each blob: its own link, plus one per generation referencing it
+    _links = _blobs(objects)
+    assert sorted(_links.values()) == [2, 2, 3] #A1, A2, B1 (in two generations)
+
+def test_collect_releases_dropped_blobs(tmp_path):
+    store, objects = _store(tmp_path)
+    for data in [b'1', b'2', b'3']:
+        store.commit({ _stat('a'):_buffer(data) })
+    ## only the current generation and its parent are kept
+    assert len(store.numbers()) == 2
+    assert len(_blobs(objects)) == 2
+    assert all( x==2 for x in _blobs(objects).values() )
+
+def test_rollback_then_commit_never_reuses_numbers(tmp_path):
+    store, objects = _store(tmp_path)
+    store.commit({ _stat('a'):_buffer(b'1') })
+    second = store.commit({ _stat('a'):_buffer(b'2') })
+    assert store.rollback()
+    assert (store.directory / _stat('a')).read_bytes() == b'1'
+    third = store.commit({ _stat('a'):_buffer(b'3') })
+    assert int(third.name) > int(second.name)
+    ## the rolled back generation is dropped along with its blob
+    assert not second.exists()
+    assert len(_blobs(objects)) == 2
+
+def test_deduplicated_across_domains(tmp_path):
+    store_a, objects = _store(tmp_path, 'a')
+    store_b = GenerationStore(tmp_path / 'b', objects)
+    store_a.commit({ _stat('x'):_buffer(b'same') })
+    store_b.fork(store_a)
+    assert len(_blobs(objects)) == 1
+    assert list(_blobs(objects).values()) == [3]
+
+def test_recover_rolls_back_torn_generation(tmp_path):
+    store, objects = _store(tmp_path)
+    store.commit({ _stat('a'):_buffer(b'good') })
+    torn = store.commit({ _stat('a'):_buffer(b'torn') })
+    ## break the link, then simulate the crash before the flip
+    (torn / _stat('a')).unlink()
+    (torn / _stat('a')).write_bytes(b'bad!')
+    (store.generations / f'{int(torn.name)+1:08d}').mkdir()
+    assert store.interrupted()
+    assert store.recover()
+    assert (store.directory / _stat('a')).read_bytes() == b'good'
+
+def test_recover_skips_rehash_without_crash(tmp_path, monkeypatch):
+    store, _ = _store(tmp_path)
+    store.commit({ _stat('a'):_buffer(b'data') })
+    assert not store.interrupted()
+    import pyvdm.core.generation as generation
+    monkeypatch.setattr(generation, 'file_digest', lambda *_: (_ for _ in ()).throw(AssertionError('re-hashed')))
+    assert store.recover()
+
+def test_concurrent_commits_are_serialized(tmp_path):
+    ## each writer opens its own store, like the CLI and the daemon
+    objects = ObjectStore(tmp_path / 'objects')
+    def _commit(idx):
+        return GenerationStore(tmp_path / 'domain', objects).commit({ _stat('a'):_buffer(str(idx).encode()) })
+    with ThreadPoolExecutor(8) as executor:
+        generations = list( executor.map(_commit, range(16)) )
+    assert len({ x.name for x in generations }) == 16
+    store = GenerationStore(tmp_path / 'domain', objects)
+    assert len(store.numbers()) == 2
+    assert store.verify(store.current())
+    assert len(_blobs(objects)) == 2
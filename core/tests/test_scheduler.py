@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from pyvdm.core.scheduler import BladeScheduler
+
+def _run(scheduler, names, reverse=False, worker=None, max_workers=4):
+    order, lock = list(), threading.Lock()
+    def _worker(name, _stat):
+        with lock: order.append(name)
+        return worker(name) if worker else None
+    tasks = { x:(x,None) for x in names }
+    with ThreadPoolExecutor(max_workers) as executor:
+        results = scheduler.run(executor, _worker, tasks, reverse)
+    return order, results
+
+def test_after_and_before_hints():
+    hints = { 'a':{'after':['b']}, 'c':{'before':['b']} }
+    order,_ = _run(BladeScheduler(hints, max_workers=1), ['a', 'b', 'c'])
+    assert order == ['c', 'b', 'a']
+
+def test_reverse_phase_flips_the_edges():
+    hints = { 'a':{'after':['b']} }
+    order,_ = _run(BladeScheduler(hints, max_workers=1), ['a', 'b'], reverse=True)
+    assert order == ['a', 'b']
+
+def test_wildcard_and_priority():
+    hints = { 'last':{'after':['*']}, 'low':{'priority':'low'}, 'core':{'priority':'core'} }
+    order,_ = _run(BladeScheduler(hints, max_workers=1), ['last', 'low', 'mid', 'core'])
+    assert order == ['core', 'mid', 'low', 'last']
+
+def test_cycle_is_broken_and_all_run(capsys):
+    hints = { 'a':{'after':['b']}, 'b':{'after':['a']}, 'c':{'after':['b']} }
+    scheduler = BladeScheduler(hints, max_workers=1)
+    edges = scheduler.build_graph(['a', 'b', 'c'])
+    assert 'Dependency cycle detected' in capsys.readouterr().out
+    ## only the back edge is dropped
+    assert edges == { 'a':{'b'}, 'b':{'c'}, 'c':set() }
+    order,_ = _run(scheduler, ['a', 'b', 'c'])
+    assert sorted(order) == ['a', 'b', 'c']
+
+def test_cycle_keeps_the_downstream_hints():
+    hints = { 'a':{'after':['b']}, 'b':{'after':['a']}, 'c':{'after':['b']}, 'd':{'after':['c']} }
+    order,_ = _run(BladeScheduler(hints, max_workers=1), ['d', 'c', 'a', 'b'])
+    assert order.index('b') < order.index('c') < order.index('d')
+
+def test_results_and_failures_release_successors():
+    hints = { 'b':{'after':['a']} }
+    def _worker(name):
+        if name=='a': raise RuntimeError('boom')
+        return ('failed', name)
+    order,results = _run(BladeScheduler(hints), ['a', 'b'], worker=_worker)
+    assert order == ['a', 'b']
+    assert results == [('failed', 'b')]
+
+def test_straggler_is_abandoned_and_successors_released():
+    release = threading.Event()
+    hints = { 'b':{'after':['slow']} }
+    def _worker(name):
+        if name=='slow': release.wait(5)
+        return None
+    scheduler = BladeScheduler(hints, deadlines={'slow':0.05})
+    abandoned = set()
+    tasks = { x:(x,None) for x in ['slow', 'b'] }
+    order = list()
+    def _record(name, _stat):
+        order.append(name)
+        return _worker(name)
+    with ThreadPoolExecutor(2) as executor:
+        results = scheduler.run(executor, _record, tasks, abandoned=abandoned)
+        ## the successor ran without waiting for the straggler
+        assert order == ['slow', 'b']
+        assert not release.is_set()
+        release.set()
+    assert results == []
+    assert abandoned == {'slow'}
+    assert scheduler.stragglers == ['slow']
+
+def test_no_deadline_waits_for_completion():
+    scheduler = BladeScheduler({}, deadlines={'fast':5})
+    abandoned = set()
+    with ThreadPoolExecutor(2) as executor:
+        scheduler.run(executor, lambda *_: None, {'fast':('fast',None), 'free':('free',None)}, abandoned=abandoned)
+    assert abandoned == set()
+    assert scheduler.stragglers == []
+
+def test_queued_plugin_is_never_abandoned_unrun():
+    ## the deadline counts from the start, not from the queueing in a busy pool
+    scheduler = BladeScheduler({}, deadlines={'queued':0.05})
+    abandoned, order = set(), list()
+    def _worker(name, _stat):
+        order.append(name)
+        if name=='busy': time.sleep(0.2)
+    tasks = { 'busy':('busy',None), 'queued':('queued',None) }
+    with ThreadPoolExecutor(1) as executor:
+        scheduler.run(executor, _worker, tasks, abandoned=abandoned)
+    assert order == ['busy', 'queued']
+    assert abandoned == set()
@@ -469,6 +469,8 @@ class InformationArea(QTableWidget):
     pass
 
 class DetailsArea(QWidget):
+    applications_signal = pyqtSignal()
+
     def __init__(self, parent, pm, am):
         super().__init__(parent)
         self.parent = parent
@@ -478,6 +480,10 @@ class DetailsArea(QWidget):
         #
         self.styleHelper()
         self.setVisible(False)
+        # follow the live application registry, the events come from the watcher thread
+        self.applications_signal.connect( self.refreshApplications )
+        self.am.subscribe( lambda *args: self.applications_signal.emit() )
+        self.am.watch()
         pass
 
     def styleHelper(self):
@@ -497,7 +503,7 @@ class DetailsArea(QWidget):
             entry  = -1
         )
         self.app_box = InformationArea(self,
-            loader= lambda: self.am.refresh().items(),
+            loader= lambda: (self.am.applications or self.am.refresh()).items(),
             header= ['[name]', 'compatible'],
             slots = {'name':self.checkPlugins},
             entry = -1
@@ -603,6 +609,19 @@ class DetailsArea(QWidget):
     def checkPlugins(self, name:str):
         return True
 
+    @pyqtSlot()
+    def refreshApplications(self):
+        _checked = set()
+        for idx in range( self.app_box.rowCount() ):
+            _item = self.app_box.item(idx, 0)
+            if _item.checkState()==Qt.Checked:
+                _checked.add( _item.data(Qt.UserRole)[0] )
+        self.app_box.refresh( list(self.am.applications.items()) )
+        for idx in range( self.app_box.rowCount() ):
+            _item = self.app_box.item(idx, 0)
+            _item.setCheckState( Qt.Checked if _item.data(Qt.UserRole)[0] in _checked else Qt.Unchecked )
+        pass
+
     @pyqtSlot()
     def cancelEdit(self):
         if self.config:
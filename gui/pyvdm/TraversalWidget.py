@@ -44,6 +44,12 @@ class TraversalController(QObject):
         QMetaObject.invokeMethod(self.root, 'setDomainList', Q_ARG("QVariant", domain_list))
         pass
 
+    @pyqtSlot(str)
+    def hover_domain(self, name):
+        if name and name!=self.root.property('openName'):
+            self.parent.prewarm_domain(name)
+        pass
+
     @pyqtSlot(str)
     def open_domain(self, openName):
         self.parent.switch_domain(openName)
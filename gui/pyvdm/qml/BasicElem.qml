@@ -94,6 +94,9 @@ Rectangle {
         onEntered: {
             show_shortcut = true
             parent.color = parent.highlight ? parent.highlightHoveredColor : parent.defaultHoveredColor
+            if (typeof parent.onHovered === "function") {
+                parent.onHovered()
+            }
         }
         onExited: {
             show_shortcut = false
@@ -40,6 +40,9 @@ Rectangle {
                     text===symPLUS? controller.fork_domain(predName, false) : controller.open_domain(text)
                 }
             }
+            function onHovered() {
+                if (text!==symPLUS) { controller.hover_domain(text) }
+            }
             function onShortcutClicked(button) {
                 switch (shortcut_text) {
                     case symNEXT: controller.set_pred_name(name); break;
@@ -9,12 +9,13 @@ import subprocess as sp
 import sys
 
 from PyQt5.QtCore import (Qt, QSize, QUrl,
-                QTimer, pyqtSignal, pyqtSlot)
+                pyqtSignal, pyqtSlot)
 from PyQt5.QtGui import (QIcon, )
 from PyQt5.QtWidgets import (QApplication, QSystemTrayIcon, QMenu, QAction)
 from PyQt5.QtMultimedia import (QAudioDeviceInfo, QSoundEffect)
 
-from pyvdm.core.manager import CoreManager
+from pyvdm.core.manager import (VDM_HOME, CoreManager, RemoteCoreManager)
+from pyvdm.core.service import (ControlClient, ControlServer)
 from pyvdm.gui.utils import (CONFIG, MFWorker, smooth_until)
 from pyvdm.gui.ControlPanel import ControlPanelWindow
 from pyvdm.gui.TransitionSceneWidget import TransitionSceneWidget
@@ -69,11 +70,14 @@ class TrayIcon(QSystemTrayIcon):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.cm = CoreManager()
+        ## attach to the running control daemon, or serve as the one
+        self.server = None
+        if ControlClient(VDM_HOME).available():
+            self.cm = RemoteCoreManager()
+        else:
+            self.cm = CoreManager() #re-open the domain for abnormal exit
+            self.server = ControlServer(self.cm, VDM_HOME).start()
         self.dm = self.cm.dm
-        _open_name = self.getCurrentDomain()
-        if _open_name: #for abnormal exit
-            self.cm.open_domain(_open_name)
         #
         self.control_panel = ControlPanelWindow(self, self.cm)
         #
@@ -106,7 +110,11 @@ class TrayIcon(QSystemTrayIcon):
         self.act_autosave.setCheckable(True)
         menu.addAction( self.act_autosave )
         self.act_autosave.triggered.connect( self.onActAutosave ) #type: ignore
-        self.autosave_timer = None
+        self.act_prewarm = QAction('Pre-warm', self)
+        self.act_prewarm.setCheckable(True)
+        self.act_prewarm.setChecked( CONFIG['PREWARM']=='True' )
+        menu.addAction( self.act_prewarm )
+        self.act_prewarm.triggered.connect( self.onActPrewarm ) #type: ignore
         menu.addSeparator()
 
         # add 'save' / 'close' / 'switch' acts
@@ -181,16 +189,16 @@ class TrayIcon(QSystemTrayIcon):
     def onActAutosave(self):
         _checked = self.act_autosave.isChecked()
         CONFIG['AUTOSAVE'] = "True" if _checked else "False"
-        
+        ## the core saves on the dirty signals, not on a fixed timer
+        self.cm.autosave(_checked)
+        pass
+
+    @pyqtSlot()
+    def onActPrewarm(self):
+        _checked = self.act_prewarm.isChecked()
+        CONFIG['PREWARM'] = "True" if _checked else "False"
         if not _checked:
-            if self.autosave_timer: self.autosave_timer.stop()
-            self.autosave_timer = None
-        else:
-            self.autosave_timer = QTimer(self)
-            self.autosave_timer.timeout.connect(
-                lambda: self.cm.save_domain() #type: ignore
-            )
-            self.autosave_timer.start(15*1000) #interval: 15s
+            self.cm.discard_standby()
         pass
 
     @pyqtSlot(QSystemTrayIcon.ActivationReason)
@@ -223,6 +231,15 @@ class TrayIcon(QSystemTrayIcon):
             self.updateTitleBar()
         pass
 
+    def prewarm_domain(self, name=None):
+        if CONFIG['PREWARM']!='True':
+            return
+        if hasattr(self, 'prewarm_worker') and self.prewarm_worker.isRunning():
+            return
+        self.prewarm_worker = MFWorker( self.cm.prewarm_domain, args=(name,) )
+        self.prewarm_worker.start()
+        pass
+
     def switch_domain(self, e):
         def _switch_domain(name):
             self.start_signal.emit()
@@ -235,6 +252,9 @@ class TrayIcon(QSystemTrayIcon):
             smooth_until(view=psutil.cpu_percent,
                          max_cond=lambda x:x<10.0 )
             self.stop_signal.emit()
+            ## guess the next domain from the history
+            if ret is True and CONFIG['PREWARM']=='True':
+                self.cm.prewarm_domain()
             pass
         ##
         _name = e.text() if hasattr(e, 'text') else str(e)
@@ -244,6 +264,8 @@ class TrayIcon(QSystemTrayIcon):
 
     def quit(self, e):
         self.close_domain()
+        if self.server: self.server.stop()
+        self.cm.shutdown()
         app.exit()
         pass
 
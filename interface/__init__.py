@@ -4,6 +4,11 @@ from abc import ABCMeta, abstractmethod
 __all__ = ['SRC_API', 'CapabilityLibrary', 'wrapper']
 
 class SRC_API(metaclass=ABCMeta):
+    # 'filename': `stat_file` is a path to open (default)
+    # 'buffer':   `stat_file` is a binary file object at the beginning,
+    #             empty in `onSave` and holding the stat in `onResume`
+    STAT_EXCHANGE = 'filename'
+
     @abstractmethod
     def onStart(self):
         return 0
@@ -24,6 +29,10 @@ class SRC_API(metaclass=ABCMeta):
     def onClose(self):
         return 0
     
+    # (Optional) return 0 if nothing changed since the last `onSave`
+    def onChanged(self):
+        return 1
+
     # @abstractmethod
     # def onTrigger(self, *args):
     #     return 0
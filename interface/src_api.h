@@ -4,9 +4,10 @@
 extern int onStart(void);
 extern int onStop(void);
 
-extern int onSave(const char *);
+extern int onSave(const char *); //the stat path, backed by memory
 extern int onResume(const char *);
 extern int onClose(void);
+extern int onChanged(void); //optional, return 0 if no change since last `onSave`
 
 extern int onTrigger(void *);
 